@@ -4,7 +4,7 @@ from datetime import datetime, date, timezone, timedelta
 from dateutil.relativedelta import relativedelta
 from enum import Enum
 from flask_cors import CORS
-from flask import abort, Blueprint, current_app, Flask, jsonify, redirect, render_template, render_template_string, request, session, url_for
+from flask import abort, Blueprint, current_app, Flask, jsonify, redirect, render_template, render_template_string, request, Response, send_file, session, stream_with_context, url_for
 from flask_login import LoginManager, login_user, login_required, logout_user, current_user, UserMixin
 from flask_mail import Message, Mail
 from flask_migrate import Migrate
@@ -24,15 +24,29 @@ from quota import ensure_week_current, next_reset_iso, get_or_create_credits
 from quota import decrement_text_or_deny, refund_text
 from quota import decrement_image_or_deny, refund_image
 from quota import IMAGE_CREDIT_COST
+from streaming import AnalysisStreamParser, sse_event
+from serializers import DreamSerializer, json_response
+from openai_gateway import OpenAIGateway, AIUnavailableError, deadline as openai_deadline
+from model_router import ModelRouter
+import metrics
+from concurrent.futures import ThreadPoolExecutor
+from cache import TTLCache, make_cache
+from tokens import count_tokens, truncate_to_tokens
+import compression
+import images
+import jobs
+import reanalyze
+import search
 from sqlalchemy import desc
+from sqlalchemy import event
 from sqlalchemy import func
 from sqlalchemy import or_
 from sqlalchemy import text
 from sqlalchemy import UniqueConstraint
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
 from sqlalchemy.dialects.mysql import JSON as MySQLJSON
 from werkzeug.utils import secure_filename
-from zoneinfo import ZoneInfo
 import base64
 import bcrypt
 import hashlib, secrets, hmac
@@ -45,10 +59,11 @@ import random
 import re
 import requests
 import jwt
+import math
 import shutil
 import string
+import threading
 import time
-import traceback
 import uuid
 
 
@@ -76,6 +91,25 @@ if os.path.exists(cfg_path):
 # env overrides (Flask 3)
 app.config.from_prefixed_env(prefix="DREAMR")
 
+# Shared OpenAI wrapper: concurrency limit, jittered backoff, circuit breaker
+gateway = OpenAIGateway(
+    client,
+    max_concurrency=int(app.config.get("OPENAI_MAX_CONCURRENCY", 16)),
+    acquire_timeout=float(app.config.get("OPENAI_ACQUIRE_TIMEOUT", 30)),
+    max_retries=int(app.config.get("OPENAI_MAX_RETRIES", 3)),
+    breaker_threshold=int(app.config.get("OPENAI_BREAKER_THRESHOLD", 5)),
+    breaker_cooldown=float(app.config.get("OPENAI_BREAKER_COOLDOWN", 30)),
+)
+# Per-operation model choice (tier / input size / fallbacks) + per-route telemetry
+router = ModelRouter(
+    gateway,
+    routes=app.config.get("MODEL_ROUTES"),
+    short_input_chars=int(app.config.get("MODEL_SHORT_INPUT_CHARS", 600)),
+)
+
+# gzip/brotli for large JSON (journal, gallery); see compression.py for settings
+compression.init_app(app)
+
 CORS(app, supports_credentials=True,origins=["https://dreamr.zentha.me", "https://dreamr-us-west-01.zentha.me", "http://localhost:5173"])
 
 db = SQLAlchemy(app)
@@ -258,6 +292,7 @@ class User(db.Model, UserMixin):
     enable_audio = db.Column(db.Boolean, default=False)
     email_confirmed = db.Column(db.Boolean, nullable=False, server_default=text("0"))
     apple_user_id = db.Column(db.String(255), unique=True, nullable=True, index=True)
+    journal_version = db.Column(db.Integer, nullable=False, default=0, server_default=text("0"))  # bumped on any dream write; list ETag
     subscriptions = db.relationship("UserSubscription", back_populates="user")
     payments = db.relationship("PaymentTransaction", back_populates="user")
 
@@ -275,6 +310,13 @@ class PendingUser(db.Model):
 
 class Dream(db.Model):
     __tablename__ = "dream"
+    __table_args__ = (
+        db.Index("ix_dream_user_created_id", "user_id", "created_at", "id"),  # list endpoints' keyset order
+        db.Index("ix_dream_user_updated_id", "user_id", "updated_at", "id"),  # /api/dreams/changes
+        # gallery: equality on the first four, then already in (created_at, id) order
+        db.Index("ix_dream_gallery", "user_id", "hidden", "is_question", "has_real_image", "created_at", "id"),
+        db.Index("ft_dream_search", "text", "analysis", "summary", "notes", mysql_prefix="FULLTEXT"),  # search.py
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -283,9 +325,14 @@ class Dream(db.Model):
     summary = db.Column(db.Text)                   # AI's response summarized
     tone = db.Column(db.String(50))                # AI's tone evaluation
     image_prompt = db.Column(db.Text)              # AI's image prompt
-    hidden = db.Column(db.Boolean, default=False)  # Hides the entry (reversable)
+    hidden = db.Column(db.Boolean, nullable=False, default=False, server_default=text("0"))  # Hides the entry (reversable)
     image_file = db.Column(db.String(255))         # saved filename (e.g., 'dream_123.png')
+    has_real_image = db.Column(db.Boolean, nullable=False, default=False, server_default=text("0"))  # image_file is a generated image, not empty/placeholder
+    image_variants = db.Column(MySQLJSON, nullable=True)  # {"webp": {"256": "<hash>-256.webp", ...}, "avif": {...}}
+    image_blurhash = db.Column(db.String(64), nullable=True)  # placeholder shown while the tile loads
+    image_color = db.Column(db.String(7), nullable=True)      # dominant colour, '#rrggbb'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     notes = db.Column(db.Text, nullable=True)
     notes_updated_at = db.Column(db.DateTime, nullable=True)
@@ -303,10 +350,63 @@ class Dream(db.Model):
         self.notes_updated_at = datetime.utcnow()
 
 
+    @staticmethod
+    def is_real_image(filename) -> bool:
+        return bool(filename and filename.strip()) and "placehold" not in filename.lower()
+
+    def set_image_file(self, filename):
+        # always assign through here so has_real_image (indexed gallery filter) stays in step
+        self.image_file = filename
+        self.has_real_image = Dream.is_real_image(filename)
+
     def __repr__(self):
         return f"<Dream id={self.id} user_id={self.user_id} hidden={self.hidden}>"
 
 
+# --- journal version ---
+# Every ORM insert/update/delete of a Dream bumps users.journal_version in the
+# same transaction, so the list endpoints can answer If-None-Match from the
+# already-loaded current_user. Bulk Query.update()/delete() on Dream bypasses
+# this hook; those callers use bump_journal_version() themselves.
+def bump_journal_version(user_ids, connection=None) -> None:
+    ids = sorted({uid for uid in user_ids if uid is not None})
+    if not ids:
+        return
+    stmt = (User.__table__.update()
+            .where(User.__table__.c.id.in_(ids))
+            .values(journal_version=User.__table__.c.journal_version + 1))
+    (connection or db.session).execute(stmt)
+
+
+class DreamTombstone(db.Model):
+    """One row per deleted dream, so /api/dreams/changes can tell clients to drop it."""
+    __tablename__ = "dream_tombstone"
+    __table_args__ = (
+        db.Index("ix_dream_tombstone_user_deleted", "user_id", "deleted_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    dream_id = db.Column(db.Integer, nullable=False)   # no FK: the dream is gone
+    user_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+@event.listens_for(Dream, "after_delete")
+def _tombstone_deleted_dream(mapper, connection, target):
+    connection.execute(DreamTombstone.__table__.insert().values(
+        dream_id=target.id, user_id=target.user_id, deleted_at=datetime.utcnow()))
+
+
+@event.listens_for(db.session, "before_flush")
+def _bump_journal_on_dream_flush(session, flush_context, instances):
+    user_ids = {obj.user_id for obj in session.new if isinstance(obj, Dream)}
+    user_ids |= {obj.user_id for obj in session.deleted if isinstance(obj, Dream)}
+    user_ids |= {obj.user_id for obj in session.dirty
+                 if isinstance(obj, Dream) and session.is_modified(obj, include_collections=False)}
+    if user_ids:
+        bump_journal_version(user_ids, connection=session.connection())
+
+
 class Discuss(db.Model):
     __tablename__ = "discuss"
 
@@ -315,11 +415,34 @@ class Discuss(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     text = db.Column(db.Text, nullable=False)      # user's message
     response = db.Column(db.Text)                  # AI's response
+    status = db.Column(db.String(16), nullable=False, default="pending")  # pending | complete | failed
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    def set_response(self, content):
+        self.response = content
+        self.status = "complete"
+
+    def set_failed(self):
+        self.response = None
+        self.status = "failed"
+
     __table_args__ = (
         db.Index("ix_discuss_dream_created", "dream_id", "created_at"),
     )
+
+
+class DiscussSummary(db.Model):
+    """Rolling summary of one dream's discussion thread; covers every Discuss row up to through_discuss_id."""
+    __tablename__ = "discuss_summary"
+    __table_args__ = (UniqueConstraint("dream_id", "user_id", name="uq_discuss_summary_dream_user"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    dream_id = db.Column(db.Integer, db.ForeignKey('dream.id', ondelete="CASCADE"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    summary = db.Column(db.Text, nullable=False, default="")
+    through_discuss_id = db.Column(db.Integer, nullable=False, default=0)
+    turns_covered = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
 
 class LifeEvent(db.Model):
@@ -475,6 +598,49 @@ class CreditPack(db.Model):
     sort_order  = db.Column(db.Integer, nullable=False, default=0)
     is_enabled  = db.Column(db.Boolean, nullable=False, default=True)
 
+class Job(db.Model):
+    """Queued LLM work (analysis / discuss / image) run by worker.py, polled via /api/jobs/<id>."""
+    __tablename__ = "jobs"
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    kind = db.Column(db.String(32), nullable=False)                 # analysis | discuss | image | reanalyze
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    status = db.Column(db.String(16), nullable=False, default="queued")  # queued | running | done | failed
+    payload = db.Column(MySQLJSON, nullable=True)
+    result = db.Column(MySQLJSON, nullable=True)
+    error = db.Column(db.String(255), nullable=True)
+    charged = db.Column(db.String(16), nullable=True)              # credit taken at enqueue: text | image
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    worker = db.Column(db.String(128), nullable=True)
+    dedupe_key = db.Column(db.String(64), nullable=True)  # single-flight key (e.g. "image:<dream_id>"), cleared when finished
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_jobs_status_created", "status", "created_at"),
+        db.Index("uq_jobs_dedupe_key", "dedupe_key", unique=True),
+    )
+
+
+class ReanalyzeRun(db.Model):
+    """Checkpoint for a bulk re-analysis pass (see reanalyze.py); one row per run name."""
+    __tablename__ = "reanalyze_runs"
+
+    name = db.Column(db.String(64), primary_key=True)
+    status = db.Column(db.String(16), nullable=False, default="running")  # running | paused | done | failed
+    filters = db.Column(MySQLJSON, nullable=True)       # user_id / interpreter / id range the run was started with
+    last_dream_id = db.Column(db.Integer, nullable=False, default=0)  # keyset cursor: everything <= this was attempted
+    failed_ids = db.Column(MySQLJSON, nullable=True)    # attempted but failed; retried by run(retry_failed=True)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    updated = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)  # == len(failed_ids)
+    elapsed_secs = db.Column(db.Float, nullable=False, default=0.0)  # model + write time across resumes
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 def _assign_trial(user):
     """Assign a 5-day Pro trial to a newly created user. No-ops if trial plan missing or user already has a subscription."""
     try:
@@ -1309,6 +1475,7 @@ def profile():
       user.enable_audio = data['enable_audio'].lower() in ['true', '1', 'yes']
 
     db.session.commit()
+    invalidate_prompt_context(user.id)
     # return jsonify({'success': True})
     return jsonify({
       'first_name': user.first_name
@@ -2217,6 +2384,7 @@ def delete_account():
         user.password = ""
 
         db.session.commit()
+        invalidate_prompt_context(user_id)
 
     except Exception as e:
         db.session.rollback()
@@ -2228,20 +2396,23 @@ def delete_account():
     return jsonify({"success": True}), 200
         
 
-def call_openai_with_retry(prompt, retries=3, delay=2):
-    for attempt in range(retries):
-        try:
-            response = openai.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": prompt}]
-            )
-            return response
-        except Exception as e:
-            logger.warning(f"[GPT Retry] Attempt {attempt+1} failed: {e}")
-            if attempt < retries - 1:
-                time.sleep(delay)
-            else:
-                raise
+# retries/backoff/circuit breaking live in openai_gateway.py, model choice in model_router.py
+# `prompt` is a single user message or a prebuilt messages list (prefix first, see _build_analysis_messages)
+def call_openai_with_retry(prompt, op="analysis", pro=None, input_chars=None, cache_key=None):
+    messages = prompt if isinstance(prompt, list) else [{"role": "user", "content": prompt}]
+    return router.chat(
+        op, pro=pro, input_chars=input_chars, prompt_cache_key=cache_key,
+        messages=messages
+    )
+
+
+def _ai_unavailable(e: AIUnavailableError):
+    """503 with Retry-After while the OpenAI circuit is open / the pool is saturated."""
+    retry_after = int(math.ceil(e.retry_after))
+    resp = jsonify({"error": "ai_unavailable", "message": e.public_message, "retry_after": retry_after})
+    resp.status_code = 503
+    resp.headers["Retry-After"] = str(retry_after)
+    return resp
 
               
 def convert_dream_to_image_prompt(message, tone=None, quality="high", image_style_slug=None):
@@ -2267,13 +2438,84 @@ def convert_dream_to_image_prompt(message, tone=None, quality="high", image_styl
         logger.debug(f"[convert_dream_to_image_prompt] Available tones: {list(TONE_TO_STYLE.keys())}")
 
     full_prompt = f"{base_prompt}\n\nRender the image in the style of \"{style}\".\n\nDream: {message}"
-    response = client.chat.completions.create(
-        model="gpt-4o",
+    response = router.chat(
+        "image_prompt",
         messages=[{"role": "user", "content": full_prompt}]
     )
     return response.choices[0].message.content.strip()
 
 
+# --- speculative image prompt ---
+# Once analysis knows the tone, the default-style prompt rewrite runs in the
+# background and is stored on Dream.image_prompt, so /api/image_generate only
+# pays for the image call itself.
+IMAGE_PROMPT_WAIT = 30  # seconds image generation waits for an in-flight precompute
+
+_background = ThreadPoolExecutor(
+    max_workers=int(app.config.get("BACKGROUND_THREADS", 4)),
+    thread_name_prefix="bg",
+)
+_image_prompt_futures = {}  # dream_id -> Future (this process only)
+_image_prompt_lock = threading.Lock()
+
+
+def _submit_background(fn, *args):
+    """Run fn(*args) on the shared background pool inside an app context."""
+    def _run():
+        with app.app_context():
+            try:
+                return fn(*args)
+            finally:
+                db.session.remove()
+    return _background.submit(_run)
+
+
+def _precompute_image_prompt(dream_id: int) -> str | None:
+    dream = Dream.query.get(dream_id)
+    if dream is None or dream.image_file or dream.hidden or dream.is_question:
+        return None
+    image_prompt = convert_dream_to_image_prompt(dream.text, dream.tone, "high")
+    # the image may have been rendered while we were waiting on the model
+    n = (Dream.query
+         .filter(Dream.id == dream_id, or_(Dream.image_file.is_(None), Dream.image_file == ""))
+         .update({"image_prompt": image_prompt}, synchronize_session=False))
+    db.session.commit()
+    if n:
+        metrics.incr("image_prompt.precomputed")
+    return image_prompt if n else None
+
+
+def _schedule_image_prompt(dream_id: int) -> None:
+    def _done(fut):
+        with _image_prompt_lock:
+            _image_prompt_futures.pop(dream_id, None)
+        if fut.exception() is not None:
+            metrics.incr("image_prompt.precompute_failed")
+            logger.warning(f"[image prompt] precompute failed for dream {dream_id}: {fut.exception()}")
+
+    with _image_prompt_lock:
+        if dream_id in _image_prompt_futures:
+            return
+        fut = _submit_background(_precompute_image_prompt, dream_id)
+        _image_prompt_futures[dream_id] = fut
+    fut.add_done_callback(_done)
+
+
+def _precomputed_image_prompt(dream: Dream, image_style_slug: str | None) -> str | None:
+    """The stored default-style prompt, if it applies to this request (waits for an in-flight one)."""
+    if image_style_slug or dream.image_file:
+        return None
+    with _image_prompt_lock:
+        fut = _image_prompt_futures.get(dream.id)
+    if fut is not None:
+        try:
+            fut.result(timeout=IMAGE_PROMPT_WAIT)
+        except Exception:
+            pass  # timed out or failed: fall back to a fresh rewrite
+        db.session.refresh(dream)
+    return dream.image_prompt or None
+
+
 # Use profile details in prompt
 def _age_years(birthdate: date | None, asof: date | None = None) -> int | None:
     if not birthdate:
@@ -2362,6 +2604,7 @@ def create_life_event():
     )
     db.session.add(ev)
     db.session.commit()
+    invalidate_prompt_context(current_user.id)
     return jsonify(_life_event_to_dict(ev)), 201
 
 @api.route("/api/life_events/<int:event_id>", methods=["PATCH"])
@@ -2396,6 +2639,7 @@ def update_life_event(event_id: int):
         ev.tags = tags or None
 
     db.session.commit()
+    invalidate_prompt_context(current_user.id)
     return jsonify(_life_event_to_dict(ev))
 
 @api.route("/api/life_events/<int:event_id>", methods=["DELETE"])
@@ -2406,6 +2650,7 @@ def delete_life_event(event_id: int):
         abort(404)
     db.session.delete(ev)
     db.session.commit()
+    invalidate_prompt_context(current_user.id)
     return jsonify({"ok": True})
 
 
@@ -2471,21 +2716,56 @@ def _events_for_prompt(user_id: int, days: int | None = None, cap: int = 5) -> l
     return [f"{r.occurred_at.date()}: {r.title}" for r in rows]
 
 
-def _build_user_payload(dream_prompt: str, user_id: int, dream_text: str) -> str:
+# Intro line + recent life events per user, shared by every analysis prompt.
+# Invalidated on profile and life-event writes; the TTL bounds staleness of
+# the age in the intro line. Set DREAMR_PROMPT_CONTEXT_CACHE_URL (redis://...)
+# to share entries across gunicorn workers.
+_prompt_context_cache = make_cache(
+    app.config.get("PROMPT_CONTEXT_CACHE_URL"),
+    prefix="dreamr:promptctx:",
+    maxsize=int(app.config.get("PROMPT_CONTEXT_CACHE_SIZE", 4096)),
+    ttl=float(app.config.get("PROMPT_CONTEXT_CACHE_TTL", 3600)),
+)
+
+
+def invalidate_prompt_context(user_id: int) -> None:
+    _prompt_context_cache.pop(user_id)
+
+
+def _prompt_context(user_id: int) -> dict:
+    """{"intro": str | None, "events": [str]} for the analysis prompt, cached per user."""
+    cached = _prompt_context_cache.get(user_id)
+    if cached is not None:
+        metrics.incr("prompt_context.hits")
+        return cached
+    metrics.incr("prompt_context.misses")
+
+    ok = True
     try:
         u = User.query.get(user_id)   # your User model
         intro = intro_line_for_prompt(u, include_gender=True, include_timezone=True) if u else None
     except Exception:
         logger.warning("user fetch/intro build failed", exc_info=True)
-        intro = None
+        intro, ok = None, False
 
     try:
         ctx_items = _events_for_prompt(user_id)
     except Exception:
         logger.warning("life_event fetch failed", exc_info=True)
-        ctx_items = []
+        ctx_items, ok = [], False
+
+    ctx = {"intro": intro, "events": ctx_items}
+    if ok:  # don't pin a degraded context for the whole TTL
+        _prompt_context_cache.set(user_id, ctx)
+    return ctx
 
-    parts = [dream_prompt]
+
+def _build_user_payload(user_id: int, dream_text: str) -> str:
+    ctx = _prompt_context(user_id)
+    intro = ctx["intro"]
+    ctx_items = ctx["events"]
+
+    parts = []
     if intro:
         parts.append("User:\n- " + intro)
     if ctx_items:
@@ -2494,31 +2774,195 @@ def _build_user_payload(dream_prompt: str, user_id: int, dream_text: str) -> str
     return "\n\n".join(parts)
 
 
-MAX_TURNS = 8
-def _build_discussion_payload(dream: Dream, turns: list[Discuss], new_text: str) -> str:
-    parts = []
-    # parts.append('ORIGINAL DREAM:\n"""' + (dream.text or "") + '"""')
-    # parts.append('\nPRIOR AI ANALYSIS:\n"""' + (dream.analysis or "") + '"""')
-    parts.append("ORIGINAL DREAM:\n---\n" + (dream.text or ""))
-    parts.append("PRIOR AI ANALYSIS:\n---\n" + (dream.analysis or ""))
-
-    # Only include turns that have both sides (or at least user text)
-    if turns:
-        lines = []
-        for t in turns:
-            if t.text:
-                # lines.append(f'User: "{t.text.strip()}"')
-                lines.append("User:\n" + t.text.strip())
-            if t.response:
-                # lines.append(f'Assistant: "{t.response.strip()}"')
-                lines.append("Assistant:\n" + t.response.strip())
-        if lines:
-            parts.append("\nDISCUSSION SO FAR:\n" + "\n".join(lines))
-
-    # parts.append('\nUSER FOLLOW-UP:\n"""' + (new_text or "") + '"""')
-    parts.append("USER FOLLOW-UP:\n---\n" + (new_text or ""))
-    return "\n\n".join(parts)
+# Discussion context is sized by tokens, not turn count: the dream and prior
+# analysis get capped shares of the budget and the rest is filled with the
+# newest turns first. MAX_TURNS only bounds how many rows are loaded.
+MAX_TURNS = 40
+DISCUSS_TOKEN_BUDGET = int(app.config.get("DISCUSS_TOKEN_BUDGET", 3000))
+DISCUSS_DREAM_SHARE = 0.35      # of the budget, at most, for the original dream
+DISCUSS_ANALYSIS_SHARE = 0.25   # ... and for the prior analysis
+DISCUSS_SUMMARY_SHARE = 0.20    # ... and for the rolling thread summary
+DISCUSS_MIN_PARTIAL_TURN = 64   # don't bother sending a truncated turn smaller than this
+
+
+def _build_discussion_messages(dream: Dream, turns: list[Discuss], new_text: str, overlay: str = "",
+                               budget: int | None = None, summary: str | None = None) -> list[dict]:
+    """
+    Chat messages for a follow-up, most stable first so provider prompt
+    caching can reuse the prefix: discuss prompt, interpreter, the dream +
+    prior analysis block (identical on every turn of a thread), then summary,
+    prior turns and the follow-up.
+    """
+    budget = budget or DISCUSS_TOKEN_BUDGET
+    messages = [{"role": "system", "content": CATEGORY_PROMPTS["discuss"]}]
+    if overlay:
+        messages.append({"role": "system", "content": "INTERPRETER PROFILE:\n---\n" + overlay})
+
+    # fixed caps (not "whatever is left") so this block is byte-identical across turns
+    dream_text = truncate_to_tokens(dream.text or "", int(budget * DISCUSS_DREAM_SHARE))
+    analysis = truncate_to_tokens(dream.analysis or "", int(budget * DISCUSS_ANALYSIS_SHARE))
+    context = "ORIGINAL DREAM:\n---\n" + dream_text + "\n\nPRIOR AI ANALYSIS:\n---\n" + analysis
+    messages.append({"role": "user", "content": context})
+
+    follow_up = "USER FOLLOW-UP:\n---\n" + (new_text or "")
+    remaining = budget - count_tokens(context) - count_tokens(follow_up) - 16  # "omitted" note
+
+    summary_part = None
+    if summary:
+        summary_part = "EARLIER DISCUSSION (SUMMARY):\n---\n" + truncate_to_tokens(
+            summary, min(int(budget * DISCUSS_SUMMARY_SHARE), max(remaining, 0)))
+        remaining -= count_tokens(summary_part)
+
+    # Newest turns first until the budget runs out; one partial turn allowed
+    picked = []
+    for t in reversed(turns or []):
+        user_msg = (t.text or "").strip()
+        reply = (t.response or "").strip()
+        if not user_msg and not reply:
+            continue
+        cost = count_tokens(user_msg) + count_tokens(reply)
+        if cost > remaining:
+            if remaining < DISCUSS_MIN_PARTIAL_TURN:
+                break
+            user_msg = truncate_to_tokens(user_msg, remaining // 2)
+            reply = truncate_to_tokens(reply, remaining - count_tokens(user_msg))
+            cost = count_tokens(user_msg) + count_tokens(reply)
+        turn = []
+        if user_msg:
+            turn.append({"role": "user", "content": user_msg})
+        if reply:
+            turn.append({"role": "assistant", "content": reply})
+        picked.append(turn)
+        remaining -= cost
+        if remaining < DISCUSS_MIN_PARTIAL_TURN:
+            break
+    omitted = len([t for t in (turns or []) if t.text or t.response]) - len(picked)
+
+    note = f"[{omitted} earlier message(s) omitted]" if omitted else None
+    if summary_part or note:
+        messages.append({"role": "user", "content": "\n\n".join(x for x in (summary_part, note) if x)})
+    for turn in reversed(picked):
+        messages.extend(turn)
+    messages.append({"role": "user", "content": follow_up})
+
+    used = sum(count_tokens(m["content"]) for m in messages)
+    metrics.observe("discuss.payload_tokens", used)
+    logger.info(
+        "discuss_payload dream_id=%s budget=%s tokens=%s turns=%s/%s summary=%s dream_truncated=%s analysis_truncated=%s",
+        dream.id, budget, used, len(picked), len(picked) + omitted, bool(summary_part),
+        dream_text != (dream.text or ""), analysis != (dream.analysis or ""),
+    )
+    return messages
+
+
+
+# --- rolling discussion summary ---
+# Older turns are folded into DiscussSummary in the background, so a discuss
+# prompt is summary + the turns after it + follow-up, whatever the thread length.
+DISCUSS_RECENT_TURNS = int(app.config.get("DISCUSS_RECENT_TURNS", 4))    # always sent verbatim
+DISCUSS_SUMMARY_EVERY = int(app.config.get("DISCUSS_SUMMARY_EVERY", 4))  # fold once this many more are waiting
+DISCUSS_SUMMARY_CHUNK = MAX_TURNS  # at most this many turns per summary call; longer backlogs take several
+
+_summary_refreshing = set()  # (dream_id, user_id) being refreshed in this process
+_summary_lock = threading.Lock()
+
 
+def _uncovered_turns(dream_id: int, user_id: int, row, exclude_id: int | None = None):
+    """Query for the thread's turns after what DiscussSummary `row` covers (unordered)."""
+    q = Discuss.query.filter(
+        Discuss.dream_id == dream_id,
+        Discuss.user_id == user_id,
+        Discuss.id > (row.through_discuss_id if row else 0),
+        Discuss.status != "failed",
+    )
+    if exclude_id is not None:
+        q = q.filter(Discuss.id != exclude_id)
+    return q
+
+
+def _thread_after_summary(dream_id: int, user_id: int, exclude_id: int | None = None):
+    """(DiscussSummary or None, the newest MAX_TURNS turns it doesn't cover, chronological) for a prompt."""
+    row = DiscussSummary.query.filter_by(dream_id=dream_id, user_id=user_id).first()
+    turns = (_uncovered_turns(dream_id, user_id, row, exclude_id)
+             .order_by(Discuss.id.desc()).limit(MAX_TURNS).all())
+    turns.reverse()
+    return row, turns
+
+
+def _refresh_discuss_summary(dream_id: int, user_id: int) -> bool:
+    """
+    Fold every uncovered turn except the newest DISCUSS_RECENT_TURNS into the
+    summary, oldest first and DISCUSS_SUMMARY_CHUNK at a time, so nothing is
+    marked covered without having been summarized.
+    """
+    dream = Dream.query.get(dream_id)
+    if dream is None:
+        return False
+    refreshed = False
+    while True:
+        row = DiscussSummary.query.filter_by(dream_id=dream_id, user_id=user_id).first()
+        q = _uncovered_turns(dream_id, user_id, row)
+        waiting = q.count() - DISCUSS_RECENT_TURNS
+        if waiting < DISCUSS_SUMMARY_EVERY:
+            return refreshed
+        fold = q.order_by(Discuss.id.asc()).limit(min(waiting, DISCUSS_SUMMARY_CHUNK)).all()
+        if not _fold_into_summary(dream, user_id, row, fold):
+            return refreshed
+        refreshed = True
+
+
+def _fold_into_summary(dream: Dream, user_id: int, row, fold: list[Discuss]) -> bool:
+    lines = []
+    for t in fold:
+        lines.append("User:\n" + (t.text or "").strip())
+        if t.response:
+            lines.append("Assistant:\n" + t.response.strip())
+    parts = [
+        CATEGORY_PROMPTS["discuss_summary"],
+        "ORIGINAL DREAM:\n---\n" + truncate_to_tokens(dream.text or "", 600),
+        "EXISTING SUMMARY:\n---\n" + ((row.summary if row else "") or "(none)"),
+        "NEW TURNS:\n---\n" + "\n".join(lines),
+    ]
+    response = router.chat("discuss_summary", messages=[{"role": "user", "content": "\n\n".join(parts)}])
+    summary = (response.choices[0].message.content or "").strip()
+    if not summary:
+        return False
+
+    through = fold[-1].id
+    try:
+        if row is None:
+            db.session.add(DiscussSummary(dream_id=dream.id, user_id=user_id, summary=summary,
+                                          through_discuss_id=through, turns_covered=len(fold)))
+        else:
+            # another process may have folded the same turns meanwhile: only move forward from what we read
+            (DiscussSummary.query
+             .filter_by(id=row.id, through_discuss_id=row.through_discuss_id)
+             .update({"summary": summary, "through_discuss_id": through,
+                      "turns_covered": row.turns_covered + len(fold)}, synchronize_session=False))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    metrics.incr("discuss_summary.refreshed")
+    logger.info("discuss_summary dream_id=%s through=%s folded=%s", dream.id, through, len(fold))
+    return True
+
+
+def _schedule_discuss_summary(dream_id: int, user_id: int) -> None:
+    key = (dream_id, user_id)
+
+    def _done(fut):
+        with _summary_lock:
+            _summary_refreshing.discard(key)
+        if fut.exception() is not None:
+            metrics.incr("discuss_summary.failed")
+            logger.warning(f"[discuss summary] refresh failed for dream {dream_id}: {fut.exception()}")
+
+    with _summary_lock:
+        if key in _summary_refreshing:
+            return
+        _summary_refreshing.add(key)
+    _submit_background(_refresh_discuss_summary, dream_id, user_id).add_done_callback(_done)
 
 
 def _strip_trailing_type_block(text: str) -> str:
@@ -2645,35 +3089,350 @@ def get_interpreter_for_user(user_id: int, interpreter_id):
     return interp
 
 
-# dream analysis
-@app.route("/api/chat", methods=["POST"])
-@login_required
-def chat():
-    logger.info(" /api/chat called")
-    data = request.get_json()
-    logger.debug(f"Received JSON: {data}")
+# --- async jobs (202 + polling) ---------------------------------------------
+JOB_WAIT_MAX = 25  # seconds a long-poll on /api/jobs/<id> may hold the request
+IMAGE_JOB_WAIT = 100  # sync /api/image_generate waits this long on another request's job (gunicorn timeout is 120)
+IMAGE_INLINE_BUDGET = 95  # ...and spends at most this long on OpenAI calls when it renders inline
+
+def _wants_async(data: dict | None) -> bool:
+    """Client opted into 202 + job polling (body "async": true, ?async=1 or Prefer: respond-async)."""
+    if "respond-async" in (request.headers.get("Prefer") or "").lower():
+        return True
+    if (request.args.get("async") or "").lower() in ("1", "true", "yes"):
+        return True
+    return bool((data or {}).get("async"))
+
+
+def _job_to_dict(job: Job) -> dict:
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "result": job.result if job.status == "done" else None,
+        "error": job.error if job.status == "failed" else None,
+        "created_at": _iso_utc(job.created_at),
+        "finished_at": _iso_utc(job.finished_at),
+    }
+
+
+def _job_accepted(job: Job):
+    body = _job_to_dict(job)
+    body["status_url"] = f"/api/jobs/{job.id}"
+    resp = jsonify(body)
+    resp.status_code = 202
+    resp.headers["Location"] = body["status_url"]
+    return resp
+
+
+def _interpreter_overlay(interp) -> str:
+    if not interp:
+        return ""
+    return INTERPRETER_TEMPLATE.format(
+        name=interp.name,
+        alias=interp.alias,
+        core_voice=interp.core_voice,
+        interpretive_lens=interp.interpretive_lens,
+        emotional_stance=interp.emotional_stance,
+    )
+
+
+def _build_analysis_messages(user_id: int, message: str, overlay: str) -> list[dict]:
+    """
+    Static prefix first (analysis prompt, then the interpreter profile) and the
+    per-request part (user context + dream) last, so provider prompt caching
+    can reuse the prefix across users.
+    """
+    #dream_prompt = CATEGORY_PROMPTS["dream"] if is_pro else CATEGORY_PROMPTS["dream_free"]
+    dream_prompt = CATEGORY_PROMPTS["dream"]
+    messages = [{"role": "system", "content": dream_prompt}]
+    if overlay:
+        messages.append({"role": "system", "content": "INTERPRETER PROFILE:\n---\n" + overlay})
+    # adds recent life events if any
+    messages.append({"role": "user", "content": _build_user_payload(user_id, message)})
+    return messages
+
+
+def _prompt_cache_key(op: str, overlay: str = "", scope=None) -> str:
+    """Groups requests that share a prefix so the provider routes them to the same cache."""
+    key = op
+    if overlay:
+        key += ":" + hashlib.sha1(overlay.encode("utf-8")).hexdigest()[:12]
+    if scope is not None:
+        key += f":{scope}"
+    return key
+
+
+def _parse_analysis_reply(content: str) -> dict:
+    """Split a model reply into analysis / summary / tone / type flags."""
+    analysis = summary = tone = None
+    type_val = None
+    is_question = is_nonsense = False
+
+    # Accept bold (**X:**) or plain (X:)
+    ANALYSIS_MARK = "**Analysis:**" if "**Analysis:**" in content else ("Analysis:" if "Analysis:" in content else None)
+    SUMMARY_MARK  = "**Summary:**"  if "**Summary:**"  in content else ("Summary:"  if "Summary:"  in content else None)
+    TONE_MARK     = "**Tone:**"     if "**Tone:**"     in content else ("Tone:"     if "Tone:"     in content else None)
+    TYPE_MARK     = "**Type:**"     if "**Type:**"     in content else ("Type:"     if "Type:"     in content else None)
+
+    # Positions (or -1 if missing)
+    iA = content.find(ANALYSIS_MARK) if ANALYSIS_MARK else -1
+    iS = content.find(SUMMARY_MARK)  if SUMMARY_MARK  else -1
+    iT = content.find(TONE_MARK)     if TONE_MARK     else -1
+    iY = content.find(TYPE_MARK)     if TYPE_MARK     else -1
+
+    def slice_between(start_mark, start_idx, end_idx):
+        if start_idx == -1 or not start_mark:
+            return None
+        start = start_idx + len(start_mark)
+        end   = len(content) if end_idx == -1 else end_idx
+        return content[start:end].strip()
+
+
+    # 1) Analysis = between Analysis and Summary
+    analysis = slice_between(ANALYSIS_MARK, iA, iS)
+    # logger.debug(f"Analysis: {analysis}")
+    logger.debug(f"Analysis: <snip>")
+
+
+    # 2) Summary = between Summary and Tone (if Tone exists) else up to Type else to end
+    summary_end_idx = iT if iT != -1 else (iY if iY != -1 else -1)
+    summary = slice_between(SUMMARY_MARK, iS, summary_end_idx)
+    logger.debug(f"Summary: {summary}")
+
+
+    # 3) Tone = between Tone and Type (if Type exists) else to end; keep only first line
+    tone_block = slice_between(TONE_MARK, iT, iY)
+    tone = tone_block.splitlines()[0].strip().rstrip(string.punctuation) if tone_block else None
+    logger.debug(f"Tone: {tone}")
+
+
+    # 4) Type = whatever comes after Type marker (used for routing, not rendered)
+    type_val = slice_between(TYPE_MARK, iY, -1)
+    tv = (type_val or "").strip().lower()
+    is_question = tv.startswith("question")
+    is_nonsense = tv.startswith("decline")
+    logger.debug(f"Type: {tv}")
+
+
+    # 5) Fallbacks:
+    # If no Analysis/Summary/Tone were found at all, show the model text minus any 'Type:' lines
+    if not any([analysis, summary, tone]):
+        content_without_type = "\n".join(
+            ln for ln in content.splitlines()
+            if not ln.strip().lower().startswith(("**type:**", "type:"))
+        ).strip()
+        analysis = content_without_type or content
+        logger.debug(f"Not Dream: {analysis}")
+
+    logger.debug(f"[parsed] is_question={is_question} is_nonsense={is_nonsense} tone={tone} summary_present={bool(summary)}")
+
+    return {
+        "analysis": analysis,
+        "summary": summary,
+        "tone": tone,
+        "is_question": is_question,
+        "is_nonsense": is_nonsense,
+    }
+
+
+def _apply_analysis_reply(dream: Dream, content: str) -> dict:
+    """Persist a parsed model reply on the dream row; returns the /api/chat response body."""
+    parsed = _parse_analysis_reply(content)
+    analysis = parsed["analysis"]
+    summary = parsed["summary"]
+
+    # --- Decline (non-dream / unrelated) ---
+    if parsed["is_nonsense"]:
+        # Use whatever we parsed; if parsing missed, fall back to whole content
+        # but strip trailing "Type:" so the user never sees it.
+        def _strip_trailing_type_block(text: str) -> str:
+            if not text:
+                return "That doesn't look like a dream. Try typing a short description instead."
+            if "**Type:**" in text:
+                return text.rsplit("**Type:**", 1)[0].rstrip()
+            if "Type:" in text:
+                return text.rsplit("Type:", 1)[0].rstrip()
+            return text
+
+        user_analysis = analysis or content
+        user_analysis = _strip_trailing_type_block(user_analysis)
+
+        # Keep the row (don’t delete), hide it by default, and save the AI reply.
+        dream.analysis = user_analysis
+        dream.summary  = summary or "Non-dream entry"
+        dream.tone     = None
+        dream.is_question = False
+        dream.hidden   = True
+        dream.set_image_file("placeholders/decline.png")  # neutral icon so FE has a thumbnail
+        db.session.commit()
+
+        # Return the same shape the FE expects
+        return {
+            "dream_id": dream.id,
+            "analysis": dream.analysis,
+            "tone": dream.tone,
+            "is_question": False,
+            "should_generate_image": False,
+        }
+
+
+    # Question → keep, but no image
+    if parsed["is_question"]:
+        dream.analysis = analysis
+        dream.summary  = summary
+        dream.tone     = None
+        dream.is_question = True
+        dream.set_image_file("placeholders/question2.png")
+        db.session.commit()
+        return {
+            "dream_id": dream.id,
+            "analysis": dream.analysis,
+            "tone": dream.tone,
+            "is_question": True,                # <-- give the client a real flag
+            "should_generate_image": False,     # <-- authoritative “don’t start”
+        }
+
+    # Dream → keep + image
+    dream.analysis = analysis
+    dream.summary  = summary
+    dream.tone     = parsed["tone"]
+    dream.is_question = False
+    db.session.commit()
+
+    # only dreams are allowed to enqueue image
+    # enqueue_image(dream.id)
+
+    should_generate_image = _can_generate_image(dream.user_id)  # <-- check if user is "pro", or "free + has credits"
+    if should_generate_image:
+        _schedule_image_prompt(dream.id)
+
+    return {
+        "dream_id": dream.id,
+        "analysis": dream.analysis,
+        "tone": dream.tone,
+        "is_question": False,
+        "should_generate_image": should_generate_image,
+    }
+
 
+# --- duplicate-submit protection for /api/chat ---
+# Key: Idempotency-Key header if sent, else sha256 of the final prompt; both per user.
+# Process-local: duplicates landing on another gunicorn worker are not caught.
+ANALYSIS_CACHE_WAIT = 90  # seconds a duplicate waits for the original request
+
+_analysis_cache = TTLCache(
+    maxsize=int(app.config.get("ANALYSIS_CACHE_SIZE", 2048)),
+    ttl=float(app.config.get("ANALYSIS_CACHE_TTL", 600)),
+)
+
+
+class _CachedAnalysis:
+    """One in-flight or finished analysis that duplicates can attach to."""
+    __slots__ = ("dream_id", "job_id", "result", "done")
+
+    def __init__(self):
+        self.dream_id = None
+        self.job_id = None
+        self.result = None
+        self.done = threading.Event()
+
+
+def _analysis_cache_key(user_id: int, messages: list[dict]) -> tuple:
+    idem = (request.headers.get("Idempotency-Key") or "").strip()
+    if idem:
+        return (user_id, "idem", idem[:128])
+    fingerprint = json.dumps(messages, sort_keys=True, ensure_ascii=False)
+    return (user_id, "prompt", hashlib.sha256(fingerprint.encode("utf-8")).hexdigest())
+
+
+def _finish_cached_analysis(ctx: dict, result: dict) -> None:
+    entry = ctx["cache_entry"]
+    entry.result = result
+    entry.done.set()
+
+
+def _drop_cached_analysis(ctx: dict) -> None:
+    _analysis_cache.discard(ctx["cache_key"], ctx["cache_entry"])
+    ctx["cache_entry"].done.set()
+
+
+def _replay_analysis(cache_key: tuple, entry: _CachedAnalysis, data: dict):
+    """
+    Answer a duplicate submission from the original request, without a model
+    call or credit. Returns None if the original failed: the entry is gone and
+    the caller handles this request as a new one.
+    """
+    logger.info("analysis_duplicate user_id=%s dream_id=%s", current_user.id, entry.dream_id)
+
+    if entry.job_id and not entry.done.is_set():
+        # async original: the worker can't touch this cache, so the job row is the truth
+        job = Job.query.get(entry.job_id)
+        if job is not None and job.status != "failed":
+            if _wants_async(data):
+                return _job_accepted(job)
+            jobs.wait(job, ANALYSIS_CACHE_WAIT)
+        if job is None or job.status == "failed":
+            _analysis_cache.discard(cache_key, entry)
+            entry.done.set()
+            return None
+        if job.status == "done":
+            entry.result = job.result
+            entry.done.set()
+    else:
+        entry.done.wait(ANALYSIS_CACHE_WAIT)
+        if entry.done.is_set() and entry.result is None:
+            return None  # the original failed and dropped its entry
+
+    if entry.result is None:
+        return jsonify({
+            "error": "duplicate_request",
+            "message": "An identical request is still being processed.",
+            "dream_id": entry.dream_id,
+        }), 409
+
+    resp = jsonify(entry.result)
+    resp.headers["Idempotent-Replayed"] = "true"
+    return resp, 200
+
+
+def _begin_dream_analysis(data: dict):
+    """
+    Shared front half of /api/chat and /api/chat/stream: duplicate check,
+    quota, bare dream row, input validation and prompt. Returns (response, None)
+    when the request is already answered, else (None, ctx) with
+    dream/prompt/refund/cache info.
+    """
     message = data.get("message")
     interpreter_id = data.get("interpreter_id")
 
     if not message:
         logger.debug("[WARN] Missing dream message.")
-        return jsonify({"error": "Missing dream message."}), 400
+        return (jsonify({"error": "Missing dream message."}), 400), None
 
     interp = get_interpreter_for_user(current_user.id, interpreter_id)
 
     logger.debug(f"{current_user.id} - {interpreter_id}")
     logger.debug(f"[get_interpreter_for_user] {interp}")
 
-    overlay = ""
-    if interp:
-        overlay = INTERPRETER_TEMPLATE.format(
-            name=interp.name,
-            alias=interp.alias,
-            core_voice=interp.core_voice,
-            interpretive_lens=interp.interpretive_lens,
-            emotional_stance=interp.emotional_stance,
-        )
+    overlay = _interpreter_overlay(interp)
+
+    # Build prompt up front (adds recent life events if any): its fingerprint is
+    # the duplicate-submit key, checked before any credit is taken
+    try:
+        messages = _build_analysis_messages(current_user.id, message, overlay)
+        # logger.debug(f"Dream Analysis Prompt: {messages}")
+    except Exception:
+        logger.error("Exception during dream processing", exc_info=True)
+        return (jsonify({"error": "internal error"}), 500), None
+
+    cache_key = _analysis_cache_key(current_user.id, messages)
+    while True:
+        entry, fresh = _analysis_cache.setdefault(cache_key, _CachedAnalysis())
+        if fresh:
+            break
+        replayed = _replay_analysis(cache_key, entry, data)
+        if replayed is not None:
+            return replayed, None
 
     # Check if user is using a free plan, and update counts
     decremented_text = False
@@ -2687,9 +3446,11 @@ def chat():
     try:
         if not is_pro:
             ok, reset_iso = decrement_text_or_deny(current_user.id)
-            
+
             if not ok:
-                return jsonify({"error": "quota_exhausted", "kind": "text", "next_reset_iso": reset_iso}), 402
+                _analysis_cache.discard(cache_key, entry)
+                entry.done.set()
+                return (jsonify({"error": "quota_exhausted", "kind": "text", "next_reset_iso": reset_iso}), 402), None
             decremented_text = True
 
         # 1) Save bare dream
@@ -2702,6 +3463,7 @@ def chat():
         )
         db.session.add(dream)
         db.session.commit()
+        entry.dream_id = dream.id
         logger.debug(f"Dream saved with ID: {dream.id}")
 
         # Check user input for length, reject if too short
@@ -2713,255 +3475,273 @@ def chat():
             dream.is_question = False
             dream.hidden   = True
             db.session.commit()
-            
-            return jsonify({
+            result = {
                 "dream_id": dream.id,
                 "analysis": err,
                 "is_question": False,
                 "should_generate_image": False,
-            }), 200
-        
-        q = "pro" if is_pro else "simple"
-        
-        # 2) Build prompt (adds recent life events if any)
-        #dream_prompt = CATEGORY_PROMPTS["dream"] if is_pro else CATEGORY_PROMPTS["dream_free"]
-        dream_prompt = CATEGORY_PROMPTS["dream"] 
-        prompt = _build_user_payload(dream_prompt, current_user.id, message)
-        
-        if overlay:
-            # prompt = overlay + "\n\n" + prompt
-            prompt += "\n\nINTERPRETER PROFILE:\n---\n" + overlay
-            prompt += "\n\n" 
-            
-        # logger.debug(f"Sending {q} prompt to OpenAI: {prompt}")
-        # logger.debug(f"Dream Analysis Prompt: {prompt}")
+            }
+            entry.result = result  # a resubmit gets the same answer
+            entry.done.set()
+
+            return (jsonify(result), 200), None
+
+    except Exception:
+        _analysis_cache.discard(cache_key, entry)
+        entry.done.set()
+        db.session.rollback()
+        if decremented_text and not is_pro:
+            refund_text(current_user.id)
+        logger.error("Exception during dream processing", exc_info=True)
+        return (jsonify({"error": "internal error"}), 500), None
+
+    return None, {
+        "dream": dream,
+        "messages": messages,
+        "prompt_cache_key": _prompt_cache_key("analysis", overlay),
+        "is_pro": is_pro,
+        "decremented_text": decremented_text,
+        "cache_key": cache_key,
+        "cache_entry": entry,
+    }
 
-        response = call_openai_with_retry(prompt)
+
+# dream analysis
+@app.route("/api/chat", methods=["POST"])
+@login_required
+def chat():
+    logger.info(" /api/chat called")
+    data = request.get_json()
+    logger.debug(f"Received JSON: {data}")
+
+    early, ctx = _begin_dream_analysis(data)
+    if early is not None:
+        return early
+
+    dream = ctx["dream"]
+    if _wants_async(data):
+        try:
+            job = jobs.enqueue(
+                "analysis", current_user.id,
+                {"dream_id": dream.id, "messages": ctx["messages"], "cache_key": ctx["prompt_cache_key"]},
+                charged=("text" if ctx["decremented_text"] else None),
+            )
+        except Exception:
+            db.session.rollback()
+            _drop_cached_analysis(ctx)
+            if ctx["decremented_text"]:
+                refund_text(current_user.id)
+            logger.error("Failed to enqueue analysis job", exc_info=True)
+            return jsonify({"error": "internal error"}), 500
+        ctx["cache_entry"].job_id = job.id
+        return _job_accepted(job)
+
+    try:
+        response = call_openai_with_retry(ctx["messages"], pro=ctx["is_pro"], input_chars=len(dream.text or ""),
+                                          cache_key=ctx["prompt_cache_key"])
         if not getattr(response, "choices", None) or not response.choices[0].message:
             logger.error("[ERROR] AI response was empty.")
+            _drop_cached_analysis(ctx)
             return jsonify({"error": "AI response was empty"}), 500
 
         content = response.choices[0].message.content.strip()
         logger.debug(f"Dream Analysis Reply: {content}")
 
+        # 3) Parse Analysis / Summary / Tone / Type and persist
+        result = _apply_analysis_reply(dream, content)
+        _finish_cached_analysis(ctx, result)
+        return jsonify(result), 200
 
-        # 3) Parse Analysis / Summary / Tone / Type
-        analysis = summary = tone = None
-        type_val = None
-        is_question = is_nonsense = False
-        
-        # Accept bold (**X:**) or plain (X:)
-        ANALYSIS_MARK = "**Analysis:**" if "**Analysis:**" in content else ("Analysis:" if "Analysis:" in content else None)
-        SUMMARY_MARK  = "**Summary:**"  if "**Summary:**"  in content else ("Summary:"  if "Summary:"  in content else None)
-        TONE_MARK     = "**Tone:**"     if "**Tone:**"     in content else ("Tone:"     if "Tone:"     in content else None)
-        TYPE_MARK     = "**Type:**"     if "**Type:**"     in content else ("Type:"     if "Type:"     in content else None)
-        
-        # Positions (or -1 if missing)
-        iA = content.find(ANALYSIS_MARK) if ANALYSIS_MARK else -1
-        iS = content.find(SUMMARY_MARK)  if SUMMARY_MARK  else -1
-        iT = content.find(TONE_MARK)     if TONE_MARK     else -1
-        iY = content.find(TYPE_MARK)     if TYPE_MARK     else -1
-        
-        def slice_between(start_mark, start_idx, end_idx):
-            if start_idx == -1 or not start_mark:
-                return None
-            start = start_idx + len(start_mark)
-            end   = len(content) if end_idx == -1 else end_idx
-            return content[start:end].strip()
-        
-        
-        # 1) Analysis = between Analysis and Summary
-        analysis = slice_between(ANALYSIS_MARK, iA, iS)
-        # logger.debug(f"Analysis: {analysis}")
-        logger.debug(f"Analysis: <snip>")
-        
-        
-        # 2) Summary = between Summary and Tone (if Tone exists) else up to Type else to end
-        summary_end_idx = iT if iT != -1 else (iY if iY != -1 else -1)
-        summary = slice_between(SUMMARY_MARK, iS, summary_end_idx)
-        logger.debug(f"Summary: {summary}")
-        
-        
-        # 3) Tone = between Tone and Type (if Type exists) else to end; keep only first line
-        tone_block = slice_between(TONE_MARK, iT, iY)
-        tone = tone_block.splitlines()[0].strip().rstrip(string.punctuation) if tone_block else None
-        logger.debug(f"Tone: {tone}")
-        
-        
-        # 4) Type = whatever comes after Type marker (used for routing, not rendered)
-        type_val = slice_between(TYPE_MARK, iY, -1)
-        tv = (type_val or "").strip().lower()
-        is_question = tv.startswith("question")
-        is_nonsense = tv.startswith("decline")
-        logger.debug(f"Type: {tv}")
-        
-        
-        # 5) Fallbacks:
-        # If no Analysis/Summary/Tone were found at all, show the model text minus any 'Type:' lines
-        if not any([analysis, summary, tone]):
-            content_without_type = "\n".join(
-                ln for ln in content.splitlines()
-                if not ln.strip().lower().startswith(("**type:**", "type:"))
-            ).strip()
-            analysis = content_without_type or content
-            logger.debug(f"Not Dream: {analysis}")
-            
-
-        logger.debug(f"[parsed] is_question={is_question} is_nonsense={is_nonsense} tone={tone} summary_present={bool(summary)}")
-
-        # --- Decline (non-dream / unrelated) ---
-        if is_nonsense:
-            # Use whatever we parsed; if parsing missed, fall back to whole content
-            # but strip trailing "Type:" so the user never sees it.
-            def _strip_trailing_type_block(text: str) -> str:
-                if not text: 
-                    return "That doesn't look like a dream. Try typing a short description instead."
-                if "**Type:**" in text:
-                    return text.rsplit("**Type:**", 1)[0].rstrip()
-                if "Type:" in text:
-                    return text.rsplit("Type:", 1)[0].rstrip()
-                return text
-        
-            user_analysis = analysis or content
-            user_analysis = _strip_trailing_type_block(user_analysis)
-        
-            # Keep the row (don’t delete), hide it by default, and save the AI reply.
-            dream.analysis = user_analysis
-            dream.summary  = summary or "Non-dream entry"
-            dream.tone     = None
-            dream.is_question = False
-            dream.hidden   = True
-            dream.image_file = "placeholders/decline.png"  # neutral icon so FE has a thumbnail
-            db.session.commit()
-        
-            # Return the same shape the FE expects
-            return jsonify({
-                "dream_id": dream.id,
-                "analysis": dream.analysis,
-                "tone": dream.tone,
-                "is_question": False,
-                "should_generate_image": False,
-            }), 200
-
-        
-        # Question → keep, but no image
-        if is_question:
-            dream.analysis = analysis
-            dream.summary  = summary
-            dream.tone     = None
-            dream.is_question = True
-            dream.image_file = f"placeholders/question2.png" 
-            db.session.commit()
-            return jsonify({
-                "dream_id": dream.id,
-                "analysis": dream.analysis,
-                "tone": dream.tone,
-                "is_question": True,                # <-- give the client a real flag
-                "should_generate_image": False,     # <-- authoritative “don’t start”
-            }), 200
-        
-        # Dream → keep + image
-        dream.analysis = analysis
-        dream.summary  = summary
-        dream.tone     = tone
-        dream.is_question = False
-        db.session.commit()
-        
-        # only dreams are allowed to enqueue image
-        # enqueue_image(dream.id)
-
-        return jsonify({
-            "dream_id": dream.id,
-            "analysis": dream.analysis,
-            "tone": dream.tone,
-            "is_question": False,
-            "should_generate_image": _can_generate_image(current_user.id),          # <-- check if user is "pro", or "free + has credits"
-        }), 200
-      
+    except AIUnavailableError as e:
+        db.session.rollback()
+        _drop_cached_analysis(ctx)
+        if ctx["decremented_text"] and not ctx["is_pro"]:
+            refund_text(current_user.id)
+        return _ai_unavailable(e)
     except Exception as e:
         db.session.rollback()
-        if decremented_text and not is_pro:
+        _drop_cached_analysis(ctx)
+        if ctx["decremented_text"] and not ctx["is_pro"]:
             refund_text(current_user.id)
         logger.error("Exception during dream processing", exc_info=True)
         return jsonify({"error": "internal error"}), 500
 
 
-# dream discussion
-@app.post("/api/dreams/<int:dream_id>/discuss")
+# dream analysis, streamed (opt-in): analysis tokens go out as SSE "token"
+# events, the Dream row is written once the stream ends ("done" event)
+@app.route("/api/chat/stream", methods=["POST"])
 @login_required
-def discuss_dream(dream_id: int):
-    data = request.get_json(silent=True) or {}
+def chat_stream():
+    logger.info(" /api/chat/stream called")
+    data = request.get_json()
+    logger.debug(f"Received JSON: {data}")
+
+    early, ctx = _begin_dream_analysis(data)
+    if early is not None:
+        return early
+
+    dream = ctx["dream"]
+    user_id = current_user.id
+
+    def generate():
+        parser = AnalysisStreamParser()
+        completed = False
+        try:
+            yield sse_event("start", {"dream_id": dream.id})
+            stream = router.stream_chat(
+                "analysis", pro=ctx["is_pro"], input_chars=len(dream.text or ""),
+                prompt_cache_key=ctx["prompt_cache_key"],
+                messages=ctx["messages"],
+            )
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                piece = parser.feed(chunk.choices[0].delta.content or "")
+                if piece:
+                    yield sse_event("token", {"text": piece})
+            tail = parser.finish()
+            if tail:
+                yield sse_event("token", {"text": tail})
+
+            content = parser.text.strip()
+            if not content:
+                raise RuntimeError("AI response was empty")
+            logger.debug(f"Dream Analysis Reply: {content}")
+
+            result = _apply_analysis_reply(dream, content)
+            _finish_cached_analysis(ctx, result)
+            completed = True
+            yield sse_event("done", result)
+
+        except GeneratorExit:
+            # client went away: nothing to send, but undo it like a failure
+            # (once the analysis is saved, a late disconnect changes nothing)
+            if not completed:
+                db.session.rollback()
+                _drop_cached_analysis(ctx)
+                if ctx["decremented_text"] and not ctx["is_pro"]:
+                    refund_text(user_id)
+                logger.info("streamed analysis abandoned by client dream_id=%s", dream.id)
+            raise
+        except AIUnavailableError as e:
+            db.session.rollback()
+            _drop_cached_analysis(ctx)
+            if ctx["decremented_text"] and not ctx["is_pro"]:
+                refund_text(user_id)
+            yield sse_event("error", {"dream_id": dream.id, "error": "ai_unavailable",
+                                      "retry_after": int(math.ceil(e.retry_after))})
+        except Exception:
+            db.session.rollback()
+            _drop_cached_analysis(ctx)
+            if ctx["decremented_text"] and not ctx["is_pro"]:
+                refund_text(user_id)
+            logger.error("Exception during streamed dream processing", exc_info=True)
+            yield sse_event("error", {"dream_id": dream.id, "error": "internal error"})
+        finally:
+            # however the stream ended, duplicates must not keep waiting on this entry
+            if not ctx["cache_entry"].done.is_set():
+                _drop_cached_analysis(ctx)
+
+    resp = Response(stream_with_context(generate()), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"  # don't let nginx buffer the stream
+    return resp
+
+
+def _begin_discussion(dream_id: int, data: dict):
+    """
+    Shared front half of the discuss endpoints: validation, pending Discuss
+    row, prompt. Returns (response, None) or (None, ctx).
+    """
     user_text = (data.get("text") or "").strip()
     if not user_text:
-        return jsonify({"error": "missing text"}), 400
+        return (jsonify({"error": "missing text"}), 400), None
     if len(user_text) > 4000:
-        return jsonify({"error": "text too long"}), 413
-    
-        
+        return (jsonify({"error": "text too long"}), 413), None
+
     interpreter_id = data.get("interpreter_id")
     interp = get_interpreter_for_user(current_user.id, interpreter_id)
-
-    overlay = ""
-    if interp:
-        overlay = INTERPRETER_TEMPLATE.format(
-            name=interp.name,
-            alias=interp.alias,
-            core_voice=interp.core_voice,
-            interpretive_lens=interp.interpretive_lens,
-            emotional_stance=interp.emotional_stance,
-        )
+    overlay = _interpreter_overlay(interp)
 
     dream = Dream.query.filter_by(id=dream_id, user_id=current_user.id).first()
     if not dream:
-        return jsonify({"error": "dream not found"}), 404
+        return (jsonify({"error": "dream not found"}), 404), None
 
     # Create discuss row first (so you have an id even if generation fails)
     drow = Discuss(
         dream_id=dream.id,
         user_id=current_user.id,
         text=user_text,
+        status="pending",
         created_at=datetime.utcnow(),
     )
     db.session.add(drow)
     db.session.commit()
 
-    # Load last MAX_TURNS prior turns (excluding current row if you want)
-    recent = (Discuss.query
-              .filter_by(dream_id=dream.id, user_id=current_user.id)
-              .order_by(Discuss.created_at.desc())
-              .limit(MAX_TURNS + 1)
-              .all())
+    # Rolling summary + the turns it doesn't cover yet (excluding the current row)
+    summary_row, recent = _thread_after_summary(dream.id, current_user.id, exclude_id=drow.id)
 
-    # Remove current row from context, then reverse to chronological
-    recent = [t for t in recent if t.id != drow.id]
-    recent.reverse()
+    messages = _build_discussion_messages(dream, recent, user_text, overlay,
+                                          summary=summary_row.summary if summary_row else None)
 
-    system_msg = CATEGORY_PROMPTS["discuss"]
-    prompt = _build_discussion_payload(dream, recent, user_text)
-    full_prompt = system_msg + "\n\n" + prompt
+    return None, {
+        "dream": dream,
+        "drow": drow,
+        "messages": messages,
+        "prompt_cache_key": _prompt_cache_key("discuss", overlay, scope=dream.id),
+    }
 
-    if overlay:
-        # full_prompt = overlay + "\n\n" + full_prompt
-        full_prompt += "\n\nINTERPRETER PROFILE:\n---\n" + overlay
-    full_prompt += "\n\n" 
+
+# dream discussion
+@app.post("/api/dreams/<int:dream_id>/discuss")
+@login_required
+def discuss_dream(dream_id: int):
+    data = request.get_json(silent=True) or {}
+    early, ctx = _begin_discussion(dream_id, data)
+    if early is not None:
+        return early
+    dream, drow = ctx["dream"], ctx["drow"]
+
+    if _wants_async(data):
+        try:
+            job = jobs.enqueue("discuss", current_user.id, {
+                "discuss_id": drow.id, "messages": ctx["messages"], "cache_key": ctx["prompt_cache_key"],
+            })
+        except Exception:
+            db.session.rollback()
+            drow.set_failed()
+            db.session.commit()
+            logger.error("Failed to enqueue discuss job", exc_info=True)
+            return jsonify({"error": "generation failed"}), 500
+        return _job_accepted(job)
 
     try:
-        response = call_openai_with_retry(full_prompt)
+        response = call_openai_with_retry(ctx["messages"], op="discussion", pro=_user_is_pro(current_user.id),
+                                          cache_key=ctx["prompt_cache_key"])
         if not getattr(response, "choices", None) or not response.choices[0].message:
             logger.error("[ERROR] AI response was empty.")
+            drow.set_failed()
+            db.session.commit()
             return jsonify({"error": "AI response was empty"}), 500
 
         content = response.choices[0].message.content.strip()
         logger.debug(f"Dream Analysis Reply: {content}")
         
+    except AIUnavailableError as e:
+        db.session.rollback()
+        drow.set_failed()
+        db.session.commit()
+        return _ai_unavailable(e)
     except Exception as e:
-        # keep the row, but store an error message or leave response NULL
-        drow.response = None
+        # keep the row, marked failed
+        db.session.rollback()
+        drow.set_failed()
         db.session.commit()
         return jsonify({"error": "generation failed"}), 500
 
-    drow.response = content
+    drow.set_response(content)
     db.session.commit()
+    _schedule_discuss_summary(dream.id, current_user.id)
 
     return jsonify({
         "dream_id": dream.id,
@@ -2969,6 +3749,71 @@ def discuss_dream(dream_id: int):
         "response": content,
     })
 
+
+# dream discussion, streamed: SSE "token" events as the reply is generated,
+# Discuss.response written once at the end ("done") or the row marked failed ("error")
+@app.post("/api/dreams/<int:dream_id>/discuss/stream")
+@login_required
+def discuss_dream_stream(dream_id: int):
+    data = request.get_json(silent=True) or {}
+    early, ctx = _begin_discussion(dream_id, data)
+    if early is not None:
+        return early
+    dream, drow = ctx["dream"], ctx["drow"]
+    user_id = current_user.id
+    is_pro = _user_is_pro(user_id)
+
+    def generate():
+        yield sse_event("start", {"dream_id": dream.id, "discuss_id": drow.id})
+        pieces = []
+        try:
+            stream = router.stream_chat(
+                "discussion", pro=is_pro,
+                prompt_cache_key=ctx["prompt_cache_key"],
+                messages=ctx["messages"],
+            )
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                piece = chunk.choices[0].delta.content or ""
+                if piece:
+                    pieces.append(piece)
+                    yield sse_event("token", {"text": piece})
+
+            content = "".join(pieces).strip()
+            if not content:
+                raise RuntimeError("AI response was empty")
+
+            drow.set_response(content)
+            db.session.commit()
+            _schedule_discuss_summary(dream.id, user_id)
+            yield sse_event("done", {"dream_id": dream.id, "discuss_id": drow.id, "response": content})
+
+        except GeneratorExit:
+            # client went away: nothing to send, just don't leave the row pending
+            if drow.status == "pending":
+                db.session.rollback()
+                drow.set_failed()
+                db.session.commit()
+            raise
+        except AIUnavailableError as e:
+            db.session.rollback()
+            drow.set_failed()
+            db.session.commit()
+            yield sse_event("error", {"dream_id": dream.id, "discuss_id": drow.id, "error": "ai_unavailable",
+                                      "retry_after": int(math.ceil(e.retry_after))})
+        except Exception:
+            db.session.rollback()
+            drow.set_failed()
+            db.session.commit()
+            logger.error("Exception during streamed discussion", exc_info=True)
+            yield sse_event("error", {"dream_id": dream.id, "discuss_id": drow.id, "error": "generation failed"})
+
+    resp = Response(stream_with_context(generate()), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"  # don't let nginx buffer the stream
+    return resp
+
     
 
 # Create a life event
@@ -2996,6 +3841,7 @@ def create_life_event():
     )
     db.session.add(ev)
     db.session.commit()
+    invalidate_prompt_context(current_user.id)
 
     return jsonify({
         "id": ev.id,
@@ -3038,6 +3884,7 @@ def update_life_event(event_id):
         ev.tags = (data.get("tags") or None)
 
     db.session.commit()
+    invalidate_prompt_context(current_user.id)
 
     return jsonify({
         "id": ev.id,
@@ -3058,6 +3905,7 @@ def delete_life_event(event_id):
         return jsonify({"error": "not found"}), 404
     db.session.delete(ev)
     db.session.commit()
+    invalidate_prompt_context(current_user.id)
     return jsonify({"ok": True})
 
 
@@ -3119,6 +3967,49 @@ def recent_life_events():
 
 
 
+# --- On-demand thumbnails ---
+# /img/dreams/320x320/<file> renders from the original on first request and is
+# served from a size-capped disk cache afterwards. Sizes are an allow-list so
+# the cache can't be filled with arbitrary boxes.
+THUMB_SOURCES = {
+    "dreams": os.path.join("static", "images", "dreams"),
+    "interpreters": os.path.join("static", "images", "interpreters"),
+}
+THUMB_SIZES = frozenset(int(s) for s in app.config.get(
+    "THUMB_SIZES", (32, 48, 64, 96, 128, 192, 256, 320, 384, 512, 768, 1024)))
+THUMB_MAX_AGE = 31536000  # a given URL+Accept always yields the same bytes
+_thumbs = images.ThumbnailCache(
+    app.config.get("THUMB_CACHE_DIR", os.path.join("static", "images", "thumbs")),
+    max_bytes=int(app.config.get("THUMB_CACHE_MAX_BYTES", 2 * 1024 ** 3)),
+)
+
+
+@app.get("/img/<kind>/<int:w>x<int:h>/<path:filename>")
+def image_thumbnail(kind: str, w: int, h: int, filename: str):
+    src_dir = THUMB_SOURCES.get(kind)
+    if src_dir is None or w not in THUMB_SIZES or h not in THUMB_SIZES:
+        abort(404)
+    name = secure_filename(filename)
+    if not name or name != filename:
+        abort(404)
+    src = os.path.join(src_dir, name)
+    if not os.path.isfile(src):
+        abort(404)
+
+    fmt = images.negotiate_format(request.headers.get("Accept"))
+    try:
+        path, key, hit = _thumbs.get_or_render(src, w, h, fmt)
+    except Exception:
+        logger.exception(f"Thumbnail render failed for {kind}/{name} {w}x{h}")
+        abort(500)
+    metrics.incr("thumbs.hit" if hit else "thumbs.miss")
+
+    resp = send_file(path, mimetype=images.MIME[fmt], etag=key, conditional=True, max_age=THUMB_MAX_AGE)
+    resp.headers["Cache-Control"] = f"public, max-age={THUMB_MAX_AGE}, immutable"
+    resp.vary.add("Accept")
+    return resp
+
+
 # used to generate smaller images for journal and tiles
 def generate_resized_image(input_path, output_path, size=(48, 48)):
     try:
@@ -3131,20 +4022,120 @@ def generate_resized_image(input_path, output_path, size=(48, 48)):
         logger.error(f"[ERROR] Failed to create resized image ({size}): {e}")
 
 
+IMAGE_VARIANT_SIZES = tuple(int(s) for s in app.config.get("IMAGE_VARIANT_SIZES", images.DEFAULT_SIZES))
+
+
+def _save_dream_image(img_bytes: bytes) -> tuple[str, dict, tuple | None]:
+    """
+    Original PNG + legacy 256 tile + WebP/AVIF variants + placeholder, all
+    from one decode. Returns (image_file, image_variants, (blurhash, color) or None).
+    """
+    filename = f"{uuid.uuid4().hex}.png"
+    image_path = os.path.join("static", "images", "dreams", filename)
+    tile_path = os.path.join("static", "images", "tiles", filename)
+    os.makedirs(os.path.dirname(image_path), exist_ok=True)
+
+    with open(image_path, "wb") as f:
+        f.write(img_bytes)
+    logger.info(f"Image saved to {image_path}")
+
+    variants, placeholder = {}, None
+    try:
+        img = images.decode(img_bytes)
+        images.save_png_thumbnail(img, tile_path, 256)
+        placeholder = images.placeholder(img)
+        variants = images.build_variants(img, images.content_id(img_bytes), sizes=IMAGE_VARIANT_SIZES)
+        logger.info(f"Image variants written: {sorted(variants)}")
+    except Exception as e:
+        # the original is saved; derivatives can be rebuilt by the backfill scripts
+        logger.error(f"[ERROR] Failed to create image derivatives for {filename}: {e}")
+    return filename, variants, placeholder
+
+
+def _render_dream_image(dream: Dream, image_style_slug: str | None, q: str = "high") -> dict:
+    """
+    Prompt rewrite + image generation + save for one dream; updates the row.
+    Raises on failure (callers own rollback/refund).
+    """
+    message = dream.text
+    tone = dream.tone
+
+    logger.debug(f"Selected Style:  {image_style_slug}")
+    image_prompt = _precomputed_image_prompt(dream, image_style_slug) if q == "high" else None
+    if image_prompt:
+        metrics.incr("image_prompt.reused")
+        logger.info("Using precomputed image prompt")
+    else:
+        logger.info(f"Converting dream to {q} quality image prompt...")
+        image_prompt = convert_dream_to_image_prompt(message, tone, q, image_style_slug=image_style_slug)
+    logger.debug(f"[image prompt]: {image_prompt}")
+
+    # logger.info("Sending image generation request...")
+
+    # Supported values are: 'gpt-image-1', 'gpt-image-1-mini', 'gpt-image-0721-mini-alpha', 'dall-e-2', and 'dall-e-3'
+    # model = "dall-e-2" if q == "low" else "dall-e-3"
+    # size  = "512x512"  if q == "low" else "1024x1024"
+
+    # dall-e-3 model
+    # logger.info("Sending dall-e-3 image generation request...")
+    # image_response = client.images.generate(
+    #     model="dall-e-3",
+    #     prompt=image_prompt,
+    #     n=1,
+    #     size="1024x1024",
+    #     response_format="url"
+    # )
+    # image_url = image_response.data[0].url
+    # logger.info(f"Image URL received: {image_url}")
+
+    # filename = f"{uuid.uuid4().hex}.png"
+    # image_path = os.path.join("static", "images", "dreams", filename)
+    # tile_path = os.path.join("static", "images", "tiles", filename)
+    # os.makedirs(os.path.dirname(image_path), exist_ok=True)
+
+    # # Fetch and save the image with a timeout
+    # img_response = requests.get(image_url, timeout=30)
+    # img_response.raise_for_status()
+
+    # with open(image_path, "wb") as f:
+    #     f.write(img_response.content)
+    # logger.info(f"Image saved to {image_path}")
+
+    # gpt-image-1.5 model (falls back per model_router.py)
+    logger.info("Sending image generation request...")
+    image_response = router.images(
+        "image",
+        prompt=image_prompt,
+        n=1,
+        size="1024x1024",
+    )
+    b64 = image_response.data[0].b64_json
+    img_bytes = base64.b64decode(b64)
+    logger.info(f"Image data received")
+
+    filename, variants, placeholder = _save_dream_image(img_bytes)
+
+    # Update DB
+    dream.set_image_file(filename)
+    dream.image_variants = variants or None
+    dream.image_blurhash, dream.image_color = placeholder or (None, None)
+    dream.image_prompt = image_prompt
+    db.session.commit()
+    logger.info("Dream successfully updated with image.")
+
+    return {
+        # "analysis": dream.analysis,
+        "image": f"/static/images/dreams/{dream.image_file}",
+        "image_variants": images.variant_urls(dream.image_variants),
+        "image_blurhash": dream.image_blurhash,
+        "image_color": dream.image_color,
+    }
+
+
 @app.post("/api/image_generate")
 @login_required
 def generate_dream_image():
     # return jsonify({"error": "disabled for testing", "kind": "image"}), 402
-    
-    is_pro = _user_is_pro(current_user.id)
-
-    # Free user: gate before any work
-    decremented_image = False
-    if not is_pro:
-        ok = decrement_image_or_deny(current_user.id)
-        if not ok:
-            return jsonify({"error": "quota_exhausted", "kind": "image"}), 402
-        decremented_image = True
 
     # was unable to get usable images from "low" quality engine, so skipping completely.
     # q = "high" if is_pro else "low" 
@@ -3174,101 +4165,85 @@ def generate_dream_image():
             "image_file": dream.image_file  # no need for getattr; dream exists
         }), 200
 
-    message = dream.text
-    tone = dream.tone
     image_style_slug = (data.get("image_style") or "").strip() or None
 
-    try:
-        logger.info(f"Converting dream to {q} quality image prompt...")
-        logger.debug(f"Selected Style:  {image_style_slug}")
-        image_prompt = convert_dream_to_image_prompt(message, tone, q, image_style_slug=image_style_slug)
-        logger.debug(f"[image prompt]: {image_prompt}")
-
-        # logger.info("Sending image generation request...")
-
-        # Supported values are: 'gpt-image-1', 'gpt-image-1-mini', 'gpt-image-0721-mini-alpha', 'dall-e-2', and 'dall-e-3'
-        # model = "dall-e-2" if q == "low" else "dall-e-3"
-        # size  = "512x512"  if q == "low" else "1024x1024"
-
-        # dall-e-3 model
-        # logger.info("Sending dall-e-3 image generation request...")
-        # image_response = client.images.generate(
-        #     model="dall-e-3",
-        #     prompt=image_prompt,
-        #     n=1,
-        #     size="1024x1024",
-        #     response_format="url"
-        # )
-        # image_url = image_response.data[0].url
-        # logger.info(f"Image URL received: {image_url}")
-
-        # filename = f"{uuid.uuid4().hex}.png"
-        # image_path = os.path.join("static", "images", "dreams", filename)
-        # tile_path = os.path.join("static", "images", "tiles", filename)
-        # os.makedirs(os.path.dirname(image_path), exist_ok=True)
-
-        # # Fetch and save the image with a timeout
-        # img_response = requests.get(image_url, timeout=30)
-        # img_response.raise_for_status()
-
-        # with open(image_path, "wb") as f:
-        #     f.write(img_response.content)
-        # logger.info(f"Image saved to {image_path}")
-
-        # gpt-image-1.5 model
-        logger.info("Sending gpt-image-1.5 image generation request...")
-        image_response = client.images.generate(
-            model="gpt-image-1.5",
-            prompt=image_prompt,
-            n=1,
-            size="1024x1024",
-        )
-        b64 = image_response.data[0].b64_json
-        img_bytes = base64.b64decode(b64)
-        logger.info(f"Image data received")
-
-        filename = f"{uuid.uuid4().hex}.png"
-        image_path = os.path.join("static", "images", "dreams", filename)
-        tile_path = os.path.join("static", "images", "tiles", filename)
-        os.makedirs(os.path.dirname(image_path), exist_ok=True)
-
-        with open(image_path, "wb") as f:
-            f.write(img_bytes)
-        logger.info(f"Image saved to {image_path}")
-
-        generate_resized_image(image_path, tile_path, size=(256, 256))
-
-        # Update DB
-        dream.image_file = filename
-        dream.image_prompt = image_prompt
-        db.session.commit()
-        logger.info("Dream successfully updated with image.")
-
-        logger.info("Returning image response to frontend")
-        return jsonify({
-            # "analysis": dream.analysis,
-            "image": f"/static/images/dreams/{dream.image_file}"
-        })
+    # 4) Single-flight per dream: a second tap attaches to the unfinished job
+    #    instead of paying for (and running) another generation
+    dedupe_key = f"image:{dream.id}"
+    job = jobs.find_inflight(dedupe_key)
+    if job is None:
+        # Free user: gate before any generation work (after the cheap guards above,
+        # so a bad id, a skipped dream or a duplicate tap never costs credits)
+        is_pro = _user_is_pro(current_user.id)
+        decremented_image = False
+        if not is_pro:
+            ok = decrement_image_or_deny(current_user.id)
+            if not ok:
+                return jsonify({"error": "quota_exhausted", "kind": "image"}), 402
+            decremented_image = True
 
+        try:
+            job = jobs.enqueue(
+                "image", current_user.id,
+                {"dream_id": dream.id, "image_style": image_style_slug, "quality": q},
+                charged=("image" if decremented_image else None),
+                dedupe_key=dedupe_key,
+            )
+        except IntegrityError:
+            # lost the race to a concurrent tap: give the credit back and attach to theirs
+            db.session.rollback()
+            if decremented_image:
+                refund_image(current_user.id)
+            job = jobs.find_inflight(dedupe_key)
+            if job is None:
+                return jsonify({"error": "Image generation failed"}), 500
+        except Exception:
+            db.session.rollback()
+            if decremented_image:
+                refund_image(current_user.id)
+            logger.exception("Failed to enqueue image job")
+            return jsonify({"error": "Image generation failed"}), 500
+    else:
+        metrics.incr("image.coalesced")
+        logger.info(f"[generate_dream_image] dream {dream.id} attached to job {job.id}")
+
+    if _wants_async(data):
+        return _job_accepted(job)
+
+    # Sync clients: run it here if no worker has picked it up, else wait for it
+    if not jobs.claim(job, f"web:{os.getpid()}"):
+        jobs.wait(job, IMAGE_JOB_WAIT)
+        if job.status == "done":
+            return jsonify({**(job.result or {}), "job_id": job.id})
+        if job.status == "failed":
+            return jsonify({"error": job.error or "Image generation failed", "job_id": job.id}), 500
+        return _job_accepted(job)  # still running: poll the status endpoint
+
+    # jobs.fail() refunds the credit recorded on the job, exactly once
+    try:
+        with openai_deadline(IMAGE_INLINE_BUDGET):
+            result = _render_dream_image(dream, image_style_slug, q)
+    except AIUnavailableError as e:
+        jobs.fail(job, e.public_message)
+        return _ai_unavailable(e)
     except openai.OpenAIError as e:
-        db.session.rollback()
-        if decremented_image:
-            refund_image(current_user.id)
         logger.error("...", exc_info=True)
+        jobs.fail(job, "OpenAI image generation failed")
         return jsonify({"error": "OpenAI image generation failed"}), 502
     except requests.RequestException as e:
-        db.session.rollback()
-        if decremented_image:
-            refund_image(current_user.id)
         logger.error("...", exc_info=True)
+        jobs.fail(job, "Failed to fetch image")
         return jsonify({"error": "Failed to fetch image"}), 504
     except Exception:
-        db.session.rollback()
-        if decremented_image:
-            refund_image(current_user.id)
         logger.exception("Unexpected error during image generation")
+        jobs.fail(job, "Image generation failed")
         return jsonify({"error": "Image generation failed"}), 500
 
+    jobs.complete(job, result)
+    logger.info("Returning image response to frontend")
+    return jsonify({**result, "job_id": job.id})
+
+
     # except openai.OpenAIError as e:
     #     logger.error(f"[ERROR] OpenAI image generation failed: {e}")
     #     return jsonify({"error": "OpenAI image generation failed"}), 502
@@ -3285,147 +4260,393 @@ def generate_dream_image():
     #     db.session.rollback()  # Only triggers on unhandled exception
 
 
+# --- job handlers (run by worker.py, see jobs.py) ---
+@jobs.register("analysis")
+def _job_analysis(job: Job) -> dict:
+    dream = Dream.query.get(job.payload["dream_id"])
+    if dream is None:
+        raise RuntimeError("dream not found")
+    response = call_openai_with_retry(job.payload.get("messages") or job.payload["prompt"],
+                                      pro=_user_is_pro(job.user_id), input_chars=len(dream.text or ""),
+                                      cache_key=job.payload.get("cache_key"))
+    if not getattr(response, "choices", None) or not response.choices[0].message:
+        raise RuntimeError("AI response was empty")
+    content = response.choices[0].message.content.strip()
+    return _apply_analysis_reply(dream, content)
+
+
+def _discuss_job_failed(job: Job) -> None:
+    # however the job failed (handler error, stale sweep), don't leave the turn pending
+    drow = Discuss.query.get(job.payload["discuss_id"])
+    if drow is not None and drow.status == "pending":
+        drow.set_failed()
+        db.session.commit()
+
+
+@jobs.register("discuss", on_fail=_discuss_job_failed)
+def _job_discuss(job: Job) -> dict:
+    drow = Discuss.query.get(job.payload["discuss_id"])
+    if drow is None:
+        raise RuntimeError("discussion row not found")
+    # on any error jobs.fail() runs _discuss_job_failed
+    response = call_openai_with_retry(job.payload.get("messages") or job.payload["prompt"], op="discussion",
+                                      pro=_user_is_pro(job.user_id), cache_key=job.payload.get("cache_key"))
+    if not getattr(response, "choices", None) or not response.choices[0].message:
+        raise RuntimeError("AI response was empty")
+    content = response.choices[0].message.content.strip()
+    drow.set_response(content)
+    db.session.commit()
+    _schedule_discuss_summary(drow.dream_id, drow.user_id)
+    return {
+        "dream_id": drow.dream_id,
+        "discuss_id": drow.id,
+        "response": content,
+    }
+
+
+@jobs.register("image")
+def _job_image(job: Job) -> dict:
+    dream = Dream.query.get(job.payload["dream_id"])
+    if dream is None:
+        raise RuntimeError("dream not found")
+    return _render_dream_image(dream, job.payload.get("image_style"), job.payload.get("quality") or "high")
+
+
+@jobs.register("reanalyze")
+def _job_reanalyze(job: Job) -> dict:
+    p = job.payload or {}
+
+    def heartbeat(stats):
+        # long runs: keep fail_stale_jobs() from treating this job as orphaned
+        Job.query.filter_by(id=job.id, status="running").update(
+            {"started_at": datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+
+    return reanalyze.run(
+        p["run"], filters=p.get("filters") or {},
+        batch_size=int(p.get("batch_size") or 50),
+        concurrency=int(p.get("concurrency") or 8),
+        limit=p.get("limit"), reset=bool(p.get("reset")),
+        retry_failed=bool(p.get("retry_failed")), on_batch=heartbeat,
+    )
+
+
+# job status; ?wait=N long-polls up to JOB_WAIT_MAX seconds for a terminal state
+@app.get("/api/jobs/<string:job_id>")
+@login_required
+def get_job(job_id: str):
+    job = Job.query.filter_by(id=job_id, user_id=current_user.id).first()
+    if not job:
+        return jsonify({"error": "job not found"}), 404
+
+    try:
+        wait = min(max(float(request.args.get("wait", 0)), 0.0), JOB_WAIT_MAX)
+    except ValueError:
+        wait = 0.0
+
+    return jsonify(_job_to_dict(jobs.wait(job, wait)))
+
+
+# --- Keyset pagination for the dream lists ---
+# ?limit=N[&cursor=...] returns {"items": [...], "next_cursor": ...}, newest
+# first by (created_at, id). Without either param the endpoints return the
+# full bare array, as older app versions expect.
+DREAM_PAGE_DEFAULT = 50
+DREAM_PAGE_MAX = 200
+
+# Compact list view: everything the journal/gallery grid shows, none of the
+# large Text columns (text/analysis/notes come from GET /api/dreams/<id>).
+# Default for paginated requests; legacy unpaginated calls opt in with ?view=compact.
+DREAM_LIST_COLUMNS = (
+    Dream.id, Dream.user_id, Dream.summary, Dream.tone, Dream.hidden, Dream.created_at,
+    Dream.image_file, Dream.image_variants, Dream.image_blurhash, Dream.image_color,
+    Dream.interpreter_id,
+)
+INTERPRETER_LIST_COLUMNS = (Interpreter.id, Interpreter.name, Interpreter.icon_file, Interpreter.animated_icon_file)
+
+
+def _compact_view() -> bool:
+    view = request.args.get("view")
+    if view in ("compact", "full"):
+        return view == "compact"
+    return "limit" in request.args or "cursor" in request.args
+
+
+# (timestamp, id) keyset cursor: created_at for the lists, updated_at for /api/dreams/changes
+def _encode_cursor(t: datetime, dream_id: int) -> str:
+    raw = json.dumps([t.isoformat(), dream_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(token: str) -> tuple[datetime, int]:
+    raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    t, dream_id = json.loads(raw)
+    return datetime.fromisoformat(t), int(dream_id)
+
+
+def _journal_etag() -> str:
+    """
+    Validator for the current user's list responses: journal version plus
+    everything else the body depends on (endpoint, query args, display tz).
+    Weak, because interpreter name/icon edits change bodies without a bump.
+    """
+    ident = "|".join((
+        str(current_user.id), str(current_user.journal_version or 0),
+        current_user.timezone or "UTC", request.path, request.query_string.decode(),
+    ))
+    return hashlib.sha1(ident.encode()).hexdigest()[:20]
+
+
+def _dream_page(query, serialize, dream_of=lambda row: row):
+    """
+    Apply keyset pagination (if requested) to a Dream query and encode it.
+    `serialize(row)` builds one item; `dream_of(row)` extracts the Dream when
+    the query yields tuples (e.g. Dream + Interpreter). Answers a matching
+    If-None-Match with 304 before touching the rows.
+    """
+    etag = _journal_etag()
+    if request.if_none_match.contains_weak(etag):
+        metrics.incr("journal.not_modified")
+        resp = Response(status=304)
+        resp.set_etag(etag, weak=True)
+        resp.headers["Cache-Control"] = "private, no-cache"
+        return resp
+    resp = _dream_page_body(query, serialize, dream_of)
+    if isinstance(resp, Response) and resp.status_code == 200:
+        resp.set_etag(etag, weak=True)
+        resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
+
+def _dream_page_body(query, serialize, dream_of):
+    limit_arg = request.args.get("limit")
+    cursor_arg = request.args.get("cursor")
+    query = query.order_by(Dream.created_at.desc(), Dream.id.desc())
+
+    if limit_arg is None and cursor_arg is None:
+        return json_response([serialize(row) for row in query.all()])
+
+    try:
+        limit = max(1, min(int(limit_arg or DREAM_PAGE_DEFAULT), DREAM_PAGE_MAX))
+        if cursor_arg:
+            c_created, c_id = _decode_cursor(cursor_arg)
+            # expanded form: MariaDB range-scans this on the composite index, unlike a row comparison
+            query = query.filter(or_(
+                Dream.created_at < c_created,
+                db.and_(Dream.created_at == c_created, Dream.id < c_id),
+            ))
+    except (ValueError, TypeError):
+        return jsonify({"error": "invalid limit or cursor"}), 400
+
+    # rows without created_at can't be keyed; legacy data only
+    rows = query.filter(Dream.created_at.isnot(None)).limit(limit + 1).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    last = dream_of(rows[-1]) if more else None
+    return json_response({
+        "items": [serialize(row) for row in rows],
+        "next_cursor": _encode_cursor(last.created_at, last.id) if more else None,
+    })
+
+
 # all dreams need to be displayed in the manage page
 @app.route("/api/alldreams", methods=["GET"])
 @login_required
 def get_alldreams():
-    user_tz = ZoneInfo(current_user.timezone or "UTC")
-
-    rows = db.session.query(Dream, Interpreter).outerjoin(
+    compact = _compact_view()
+    query = db.session.query(Dream, Interpreter).outerjoin(
         Interpreter, Dream.interpreter_id == Interpreter.id
-    ).filter(Dream.user_id == current_user.id).order_by(Dream.created_at.desc()).all()
+    ).filter(Dream.user_id == current_user.id)
+    if compact:
+        query = query.options(load_only(*DREAM_LIST_COLUMNS), load_only(*INTERPRETER_LIST_COLUMNS))
 
-    def convert_created_at(dt):
-        try:
-            print(f"Original datetime: {dt} (tzinfo={dt.tzinfo})")
-            return dt.replace(tzinfo=timezone.utc).astimezone(user_tz).isoformat()
-        except Exception as e:
-            print(f"[ERROR] Timestamp conversion failed: {e}")
-            traceback.print_exc()
-            return None
-
-    def interpreter_icon_path(interp):
-        if not interp:
-            return None
-        f = interp.animated_icon_file or interp.icon_file
-        return f"/static/images/interpreters/{f}" if f else None
-
-    return jsonify([
-        {
-            "id": d.id,
-            "summary": d.summary,
-            "text": d.text,
-            "analysis": d.analysis,
-            "hidden": d.hidden,
-            "tone": d.tone,
-            "image_file": f"/static/images/dreams/{d.image_file}" if d.image_file else None,
-            "image_tile": f"/static/images/tiles/{d.image_file}" if d.image_file else None,
-            "created_at": convert_created_at(d.created_at) if d.created_at else None,
-            "interpreter_id": d.interpreter_id,
-            "interpreter_name": interp.name if interp else None,
-            "interpreter_icon": interpreter_icon_path(interp),
-        } for d, interp in rows
-    ])
+    serializer = DreamSerializer(current_user.timezone, compact=compact, hidden=True, interpreter=True)
+    return _dream_page(query, lambda row: serializer(*row), dream_of=lambda row: row[0])
 
 # fetch gallery images
 @app.route("/api/gallery", methods=["GET"])
 @login_required
 def get_gallery():
-    user_tz = ZoneInfo(current_user.timezone or "UTC")
-
-    # dreams = Dream.query.filter(
-    #     Dream.user_id == current_user.id,
-    #     or_(Dream.hidden == False, Dream.hidden.is_(None))
-    # ).order_by(Dream.created_at.desc()).all()
-
-    dreams = (
+    query = (
         Dream.query
         .filter(
             Dream.user_id == current_user.id,
-            or_(Dream.hidden == False, Dream.hidden.is_(None)),
-
-            # has an image filename
-            Dream.image_file.isnot(None),
-            func.length(func.trim(Dream.image_file)) > 0,
-
-            # EXCLUDE placeholders (matches 'placeholder' or 'placeholders')
-            ~func.lower(Dream.image_file).like("%placehold%"),
-
+            Dream.hidden == False,
             # EXCLUDE AI questions
-            or_(Dream.is_question == False, Dream.is_question.is_(None)),
+            Dream.is_question == False,
+            # a generated image: not empty, not a placeholder (see Dream.set_image_file)
+            Dream.has_real_image == True,
         )
-        .order_by(Dream.created_at.desc())
-        .all()
     )
+    compact = _compact_view()
+    if compact:
+        query = query.options(load_only(*DREAM_LIST_COLUMNS))
 
-    def convert_created_at(dt):
-        try:
-            print(f"Original datetime: {dt} (tzinfo={dt.tzinfo})")
-            return dt.replace(tzinfo=timezone.utc).astimezone(user_tz).isoformat()
-        except Exception as e:
-            print(f"[ERROR] Timestamp conversion failed: {e}")
-            traceback.print_exc()
-            return None
+    serializer = DreamSerializer(current_user.timezone, compact=compact, notes=True)
+    return _dream_page(query, serializer)
 
-    return jsonify([
-        {
-            "id": d.id,
-            "summary": d.summary,
-            "text": d.text,
-            "analysis": d.analysis,
-            "tone": d.tone,
-            "image_file": f"/static/images/dreams/{d.image_file}" if d.image_file else None,
-            "image_tile": f"/static/images/tiles/{d.image_file}" if d.image_file else None,
-            "created_at": convert_created_at(d.created_at) if d.created_at else None,
-            "notes": d.notes
-        } for d in dreams
-    ])
 
-    
 # fetch dreams
 @app.route("/api/dreams", methods=["GET"])
 @login_required
 def get_dreams():
-    user_tz = ZoneInfo(current_user.timezone or "UTC")
-
-    rows = db.session.query(Dream, Interpreter).outerjoin(
+    compact = _compact_view()
+    query = db.session.query(Dream, Interpreter).outerjoin(
         Interpreter, Dream.interpreter_id == Interpreter.id
     ).filter(
         Dream.user_id == current_user.id,
-        or_(Dream.hidden == False, Dream.hidden.is_(None))
-    ).order_by(Dream.created_at.desc()).all()
+        Dream.hidden == False,
+    )
+    if compact:
+        query = query.options(load_only(*DREAM_LIST_COLUMNS), load_only(*INTERPRETER_LIST_COLUMNS))
 
-    def convert_created_at(dt):
-        try:
-            print(f"Original datetime: {dt} (tzinfo={dt.tzinfo})")
-            return dt.replace(tzinfo=timezone.utc).astimezone(user_tz).isoformat()
-        except Exception as e:
-            print(f"[ERROR] Timestamp conversion failed: {e}")
-            traceback.print_exc()
-            return None
+    serializer = DreamSerializer(current_user.timezone, compact=compact, notes=True, interpreter=True)
+    return _dream_page(query, lambda row: serializer(*row), dream_of=lambda row: row[0])
 
-    def interpreter_icon_path(interp):
-        if not interp:
-            return None
-        f = interp.animated_icon_file or interp.icon_file
-        return f"/static/images/interpreters/{f}" if f else None
+# one dream in full (the list endpoints' compact view leaves out text/analysis/notes)
+@app.get("/api/dreams/<int:dream_id>")
+@login_required
+def get_dream(dream_id: int):
+    row = db.session.query(Dream, Interpreter).outerjoin(
+        Interpreter, Dream.interpreter_id == Interpreter.id
+    ).filter(Dream.id == dream_id, Dream.user_id == current_user.id).first()
+    if row is None:
+        return jsonify({"error": "not found"}), 404
+    d, interp = row
+
+    discussion_count = (db.session.query(func.count(Discuss.id))
+                        .filter(Discuss.dream_id == d.id, Discuss.user_id == current_user.id,
+                                Discuss.status != "failed")
+                        .scalar())
+
+    serializer = DreamSerializer(current_user.timezone)
+    return json_response({**serializer.full(d, interp), "discussion_count": discussion_count})
+
+
+# --- Search ---
+# GET /api/dreams/search?q=...&limit=&cursor= -> ranked compact dreams with a
+# snippet each. Backend: MariaDB FULLTEXT, or an in-process index elsewhere
+# (see search.py; override with DREAMR_SEARCH_BACKEND=fulltext|memory).
+SEARCH_PAGE_DEFAULT = 20
+SEARCH_PAGE_MAX = 50
+SEARCH_MAX_QUERY = 200
+_search_backend = None
+_search_backend_lock = threading.Lock()
+
+
+def _get_search_backend():
+    global _search_backend
+    with _search_backend_lock:
+        if _search_backend is None:
+            _search_backend = search.make_backend(
+                db.engine.dialect.name,
+                configured=app.config.get("SEARCH_BACKEND"),
+                max_users=int(app.config.get("SEARCH_INDEX_USERS", 256)),
+            )
+            logger.info(f"dream search backend: {_search_backend.name}")
+        return _search_backend
+
+
+@app.get("/api/dreams/search")
+@login_required
+def search_dreams():
+    q = (request.args.get("q") or "").strip()
+    if not search.tokenize(q):
+        return jsonify({"error": "missing query"}), 400
+    if len(q) > SEARCH_MAX_QUERY:
+        return jsonify({"error": f"query longer than {SEARCH_MAX_QUERY} characters"}), 400
+    try:
+        limit = max(1, min(int(request.args.get("limit") or SEARCH_PAGE_DEFAULT), SEARCH_PAGE_MAX))
+        cursor_arg = request.args.get("cursor")
+        cursor = search.decode_cursor(cursor_arg) if cursor_arg else None
+    except (ValueError, TypeError):
+        return jsonify({"error": "invalid limit or cursor"}), 400
+
+    t0 = time.monotonic()
+    hits = _get_search_backend().page(current_user, q, limit + 1, cursor)
+    more = len(hits) > limit
+    hits = hits[:limit]
+
+    found = {}
+    if hits:
+        found = {d.id: (d, interp) for d, interp in
+                 db.session.query(Dream, Interpreter)
+                 .outerjoin(Interpreter, Dream.interpreter_id == Interpreter.id)
+                 .filter(Dream.user_id == current_user.id, Dream.id.in_([i for _, i in hits]))
+                 .all()}
+
+    serializer = DreamSerializer(current_user.timezone, compact=True, interpreter=True)
+    items = []
+    for score, dream_id in hits:
+        if dream_id not in found:
+            continue   # deleted between the two queries
+        d, interp = found[dream_id]
+        items.append({**serializer(d, interp), "score": score, "snippet": search.snippet(d, q)})
+    metrics.observe("search.latency_ms", (time.monotonic() - t0) * 1000.0)
+
+    return json_response({
+        "items": items,
+        "next_cursor": search.encode_cursor(*hits[-1]) if more else None,
+    })
+
+
+# --- Delta sync ---
+# GET /api/dreams/changes?since=<cursor> -> dreams created/updated after the
+# cursor (full rows, hidden ones included with their flag) plus ids deleted
+# since then. Page with next_cursor while has_more. Timestamps are whole
+# seconds and commits can land out of order, so the final cursor is held
+# DREAM_SYNC_OVERLAP behind now: the next sync may resend a few rows, which
+# clients apply idempotently, but never skips one.
+DREAM_SYNC_PAGE = 200
+DREAM_SYNC_OVERLAP = timedelta(seconds=5)
+
+
+@app.get("/api/dreams/changes")
+@login_required
+def get_dream_changes():
+    since_arg = request.args.get("since")
+    try:
+        limit = max(1, min(int(request.args.get("limit") or DREAM_SYNC_PAGE), DREAM_SYNC_PAGE))
+        since_t, since_id = _decode_cursor(since_arg) if since_arg else (datetime(1970, 1, 1), 0)
+    except (ValueError, TypeError):
+        return jsonify({"error": "invalid limit or cursor"}), 400
+
+    now = datetime.utcnow()
+    rows = (db.session.query(Dream, Interpreter)
+            .outerjoin(Interpreter, Dream.interpreter_id == Interpreter.id)
+            .filter(Dream.user_id == current_user.id)
+            .filter(or_(Dream.updated_at > since_t,
+                        db.and_(Dream.updated_at == since_t, Dream.id > since_id)))
+            .order_by(Dream.updated_at.asc(), Dream.id.asc())
+            .limit(limit + 1)
+            .all())
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if has_more:
+        last = rows[-1][0]
+        next_t, next_id = last.updated_at, last.id
+    else:
+        next_t, next_id = now - DREAM_SYNC_OVERLAP, 0
+        if since_t > next_t:
+            next_t, next_id = since_t, since_id   # never move the cursor backwards
+
+    deleted = [r.dream_id for r in (
+        DreamTombstone.query
+        .filter(DreamTombstone.user_id == current_user.id,
+                DreamTombstone.deleted_at >= since_t - DREAM_SYNC_OVERLAP,
+                DreamTombstone.deleted_at <= (next_t if has_more else now))
+        .order_by(DreamTombstone.deleted_at.asc(), DreamTombstone.id.asc())
+        .all())]
+
+    serializer = DreamSerializer(current_user.timezone)
+    return json_response({
+        "dreams": [serializer.full(d, interp) for d, interp in rows],
+        "deleted": deleted,
+        "next_cursor": _encode_cursor(next_t, next_id),
+        "has_more": has_more,
+    })
 
-    return jsonify([
-        {
-            "id": d.id,
-            "summary": d.summary,
-            "text": d.text,
-            "analysis": d.analysis,
-            "tone": d.tone,
-            "image_file": f"/static/images/dreams/{d.image_file}" if d.image_file else None,
-            "image_tile": f"/static/images/tiles/{d.image_file}" if d.image_file else None,
-            "created_at": convert_created_at(d.created_at) if d.created_at else None,
-            "notes": d.notes,
-            "interpreter_id": d.interpreter_id,
-            "interpreter_name": interp.name if interp else None,
-            "interpreter_icon": interpreter_icon_path(interp),
-        } for d, interp in rows
-    ])
 
 # For deleting dreams, and moving the images
 @app.route("/api/dreams/<int:dream_id>", methods=["DELETE"])
@@ -3440,9 +4661,10 @@ def delete_dream(dream_id):
         (Discuss.query
             .filter_by(dream_id=dream.id, user_id=current_user.id)
             .delete(synchronize_session=False))
+        DiscussSummary.query.filter_by(dream_id=dream.id).delete(synchronize_session=False)
 
         # Move image files to archive folder — best-effort, never blocks the delete
-        if dream.image_file and dream.image_file.strip():
+        if dream.has_real_image:
             try:
                 image_filename = os.path.basename(dream.image_file.strip())
                 image_path = os.path.join("static", "images", "dreams", image_filename)
@@ -3454,6 +4676,7 @@ def delete_dream(dream_id):
                 for path in [image_path, tile_path]:
                     if os.path.exists(path):
                         shutil.move(path, os.path.join(archive_dir, os.path.basename(path)))
+                images.remove_variants(dream.image_variants)
             except Exception as img_err:
                 print(f"[WARN] Could not archive image for dream {dream_id}: {img_err}")
 
@@ -3636,6 +4859,7 @@ def get_discuss(dream_id: int):
                 "id": r.id,
                 "text": r.text or "",
                 "response": r.response or "",
+                "status": r.status,
                 "created_at": r.created_at.isoformat() + "Z",
             } for r in rows
         ]
@@ -3963,7 +5187,7 @@ def generate_interpreter_icon(interp_id):
         logger.info(f"Generating interpreter icon for {interp_id} (icon_key={icon_key})...")
 
         # Prefer gpt-image-1 for pixel-art consistency and direct bytes
-        image_response = client.images.generate(
+        image_response = gateway.images(
             model="gpt-image-1",
             prompt=icon_prompt,
             n=1,
@@ -3995,6 +5219,9 @@ def generate_interpreter_icon(interp_id):
             "icon_key": icon_key
         }), 200
 
+    except AIUnavailableError as e:
+        db.session.rollback()
+        return _ai_unavailable(e)
     except openai.OpenAIError:
         db.session.rollback()
         logger.error("OpenAI icon generation failed", exc_info=True)
@@ -4585,6 +5812,64 @@ def admin_debug():
     }, 200
 
 
+# Process-local counters (OpenAI gateway etc.); one snapshot per gunicorn worker
+@app.get("/admin/metrics")
+@admin_required
+def admin_metrics():
+    return jsonify({
+        "pid": os.getpid(),
+        "openai": gateway.stats(),
+        "models": router.stats(),
+        "compression": metrics.snapshot("compress."),
+    })
+
+
+# Bulk re-analysis (see reanalyze.py); runs on the job worker, resumable by run name
+@app.post("/admin/reanalyze")
+@admin_required
+def admin_reanalyze():
+    data = request.get_json(silent=True) or {}
+    name = (data.get("run") or "").strip()
+    if not name or len(name) > 64:
+        return jsonify({"error": "run name (max 64 chars) is required"}), 400
+
+    try:
+        filters = {key: int(data[key]) for key in ("user_id", "min_id", "max_id") if data.get(key)}
+        batch_size = int(data.get("batch_size") or 50)
+        concurrency = int(data.get("concurrency") or 8)
+        limit = int(data["limit"]) if data.get("limit") is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "user_id, min_id, max_id, batch_size, concurrency and limit must be integers"}), 400
+    if batch_size < 1 or concurrency < 1 or (limit is not None and limit < 1):
+        return jsonify({"error": "batch_size, concurrency and limit must be positive"}), 400
+
+    if data.get("interpreter"):
+        interp = Interpreter.query.filter_by(slug=data["interpreter"]).one_or_none()
+        if interp is None:
+            return jsonify({"error": "unknown interpreter"}), 400
+        filters["interpreter_id"] = interp.id
+
+    job = jobs.enqueue("reanalyze", current_user.id, {
+        "run": name,
+        "filters": filters,
+        "batch_size": min(batch_size, 500),
+        "concurrency": min(concurrency, 64),
+        "limit": limit,
+        "reset": bool(data.get("reset")),
+        "retry_failed": bool(data.get("retry_failed")),
+    })
+    return _job_accepted(job)
+
+
+@app.get("/admin/reanalyze/<string:name>")
+@admin_required
+def admin_reanalyze_status(name):
+    run = ReanalyzeRun.query.get(name)
+    if run is None:
+        return jsonify({"error": "not found"}), 404
+    return jsonify(reanalyze.progress(run))
+
+
 # --- Helpers ---
 def _parse_iso_optional(s: str | None):
     if not s:
@@ -4711,8 +5996,8 @@ def admin_toggle_dream_hidden(user_id: int, dream_id: int):
 # --- Delete dream (with image archival) ---
 def _archive_dream_images(dream):
     """Move a dream's image/tile into the deleted archive, ignore errors."""
-    if not dream.image_file:
-        return
+    if not dream.has_real_image:
+        return  # nothing, or a shared placeholder file
 
     try:
         image_path = os.path.join("static", "images", "dreams", dream.image_file)
@@ -4723,6 +6008,7 @@ def _archive_dream_images(dream):
         for path in (image_path, tile_path):
             if os.path.exists(path):
                 shutil.move(path, os.path.join(archive_dir, os.path.basename(path)))
+        images.remove_variants(dream.image_variants)
     except Exception:
         pass
 
@@ -0,0 +1,82 @@
+# blurhash.py
+# Pure-Python BlurHash encoder (https://blurha.sh). Input is a small RGB image
+# (callers downscale to ~32px first; cost is pixels x components), output is a
+# short string clients decode into a blurred placeholder while the tile loads.
+import math
+
+_BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+# sRGB byte -> linear, precomputed once
+_TO_LINEAR = [
+    (v / 12.92) if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+    for v in (i / 255.0 for i in range(256))
+]
+
+
+def _base83(value: int, length: int) -> str:
+    out = []
+    for i in range(1, length + 1):
+        digit = (value // 83 ** (length - i)) % 83
+        out.append(_BASE83[digit])
+    return "".join(out)
+
+
+def _to_srgb(v: float) -> int:
+    v = max(0.0, min(1.0, v))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(v: float, exp: float) -> float:
+    return math.copysign(abs(v) ** exp, v)
+
+
+def encode(img, x_components: int = 4, y_components: int = 3) -> str:
+    """BlurHash of a PIL image (converted to RGB)."""
+    if not (1 <= x_components <= 9 and 1 <= y_components <= 9):
+        raise ValueError("components must be between 1 and 9")
+    img = img.convert("RGB")
+    width, height = img.size
+    pixels = [(_TO_LINEAR[r], _TO_LINEAR[g], _TO_LINEAR[b]) for r, g, b in img.getdata()]
+
+    # cosine bases per axis, reused across components
+    cos_x = [[math.cos(math.pi * i * x / width) for x in range(width)] for i in range(x_components)]
+    cos_y = [[math.cos(math.pi * j * y / height) for y in range(height)] for j in range(y_components)]
+
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            r = g = b = 0.0
+            cx = cos_x[i]
+            for y in range(height):
+                cy = cos_y[j][y]
+                row = y * width
+                for x in range(width):
+                    basis = cx[x] * cy
+                    pr, pg, pb = pixels[row + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = (1 if i == 0 and j == 0 else 2) / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    out = [_base83((x_components - 1) + (y_components - 1) * 9, 1)]
+
+    if ac:
+        actual_max = max(abs(c) for f in ac for c in f)
+        quantised_max = max(0, min(82, int(math.floor(actual_max * 166 - 0.5))))
+        max_value = (quantised_max + 1) / 166
+        out.append(_base83(quantised_max, 1))
+    else:
+        max_value = 1.0
+        out.append(_base83(0, 1))
+
+    out.append(_base83((_to_srgb(dc[0]) << 16) + (_to_srgb(dc[1]) << 8) + _to_srgb(dc[2]), 4))
+
+    for f in ac:
+        q = [max(0, min(18, int(math.floor(_sign_pow(c / max_value, 0.5) * 9 + 9.5)))) for c in f]
+        out.append(_base83(q[0] * 19 * 19 + q[1] * 19 + q[2], 2))
+
+    return "".join(out)
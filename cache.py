@@ -0,0 +1,125 @@
+# cache.py
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis  # optional: shared backend so gunicorn workers agree
+except ImportError:  # pragma: no cover
+    redis = None
+
+logger = logging.getLogger("dreamr")
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry (process-local)."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float | None = None) -> None:
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def setdefault(self, key, value, ttl: float | None = None):
+        """Insert `value` unless a live entry exists. Returns (stored_value, inserted)."""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING and item[0] > time.monotonic():
+                self._data.move_to_end(key)
+                return item[1], False
+            self._store(key, value, ttl)
+            return value, True
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+            return default if item is _MISSING else item[1]
+
+    def discard(self, key, value) -> bool:
+        """Remove `key` only while it still maps to this very `value`; True if it did."""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING or item[1] is not value:
+                return False
+            del self._data[key]
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def _store(self, key, value, ttl):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+class RedisCache:
+    """
+    Same get/set/pop surface as TTLCache, stored in Redis as JSON so every
+    worker sees the same entries. Backend errors are logged and treated as a
+    miss; callers never fail because the cache is down.
+    """
+
+    def __init__(self, url: str, prefix: str, ttl: float = 600.0):
+        self.prefix = prefix
+        self.ttl = ttl
+        self._r = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def _key(self, key) -> str:
+        return f"{self.prefix}{key}"
+
+    def get(self, key, default=None):
+        try:
+            raw = self._r.get(self._key(key))
+        except redis.RedisError:
+            logger.warning("cache get failed for %s", self._key(key), exc_info=True)
+            return default
+        return default if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl: float | None = None) -> None:
+        try:
+            self._r.set(self._key(key), json.dumps(value), px=int((self.ttl if ttl is None else ttl) * 1000))
+        except redis.RedisError:
+            logger.warning("cache set failed for %s", self._key(key), exc_info=True)
+
+    def pop(self, key, default=None):
+        try:
+            self._r.delete(self._key(key))
+        except redis.RedisError:
+            logger.warning("cache delete failed for %s", self._key(key), exc_info=True)
+        return default
+
+
+def make_cache(url: str | None, prefix: str, maxsize: int = 1024, ttl: float = 600.0):
+    """RedisCache when a URL is configured and redis is installed, else a process-local TTLCache."""
+    if url:
+        if redis is not None:
+            return RedisCache(url, prefix, ttl=ttl)
+        logger.warning("redis not installed; %s cache is process-local", prefix)
+    return TTLCache(maxsize=maxsize, ttl=ttl)
@@ -0,0 +1,100 @@
+# compression.py
+# gzip / brotli for large text responses (journal/gallery JSON is mostly long
+# Markdown). Negotiated from Accept-Encoding; skipped for small bodies,
+# streamed/passthrough responses (SSE, send_file) and anything not textual.
+# Per-endpoint counters land in metrics under "compress.<endpoint>.":
+# responses / bytes_in / bytes_out cover every response (bytes_out is what was
+# sent, so bytes_out / bytes_in is the route's real ratio); compressed /
+# compressed_bytes_in / compressed_bytes_out only the ones we encoded.
+import gzip
+
+from flask import request
+
+import metrics
+
+try:
+    import brotli  # optional: ~15-25% smaller than gzip on JSON at similar CPU
+except ImportError:  # pragma: no cover
+    brotli = None
+
+COMPRESSIBLE = frozenset((
+    "application/json", "application/javascript", "application/xml",
+    "image/svg+xml", "text/html", "text/plain", "text/css", "text/csv", "text/xml",
+))
+
+
+def _choose(accept, allow_br: bool) -> str | None:
+    # highest client q wins; on a tie prefer br (smaller at these settings)
+    candidates = []
+    if allow_br and brotli is not None:
+        candidates.append(("br", accept.quality("br")))
+    candidates.append(("gzip", accept.quality("gzip")))
+    best, q = max(candidates, key=lambda c: c[1])
+    return best if q > 0 else None
+
+
+def _record(key: str, size_in: int, size_out: int | None = None) -> None:
+    metrics.incr(f"{key}.responses")
+    metrics.incr(f"{key}.bytes_in", size_in)
+    metrics.incr(f"{key}.bytes_out", size_in if size_out is None else size_out)
+    if size_out is not None:
+        metrics.incr(f"{key}.compressed")
+        metrics.incr(f"{key}.compressed_bytes_in", size_in)
+        metrics.incr(f"{key}.compressed_bytes_out", size_out)
+
+
+def init_app(app) -> None:
+    """
+    Settings (DREAMR_ env or config file):
+      COMPRESS_MIN_SIZE    bytes below which we don't bother (default 1024)
+      COMPRESS_GZIP_LEVEL  1-9 (default 5: most of level 9's ratio at a fraction of the CPU)
+      COMPRESS_BR_QUALITY  0-11 (default 4, same reasoning; 11 is for static assets)
+      COMPRESS_BROTLI      set false to serve gzip only
+    """
+    min_size = int(app.config.get("COMPRESS_MIN_SIZE", 1024))
+    gzip_level = int(app.config.get("COMPRESS_GZIP_LEVEL", 5))
+    br_quality = int(app.config.get("COMPRESS_BR_QUALITY", 4))
+    allow_br = bool(app.config.get("COMPRESS_BROTLI", True))
+
+    @app.after_request
+    def _compress(response):
+        key = f"compress.{request.endpoint or 'unknown'}"
+        if response.direct_passthrough or response.is_streamed:
+            # leave the body alone; count it if the size is known (send_file sets it)
+            if response.content_length is not None:
+                _record(key, response.content_length)
+            return response
+
+        body = response.get_data()
+        if (response.status_code != 200
+                or response.mimetype not in COMPRESSIBLE
+                or "Content-Encoding" in response.headers
+                or "Content-Range" in response.headers
+                or "no-transform" in (response.headers.get("Cache-Control") or "")):
+            _record(key, len(body))
+            return response
+
+        response.vary.add("Accept-Encoding")  # even when this one goes out identity
+        encoding = _choose(request.accept_encodings, allow_br)
+        if encoding is None or len(body) < min_size:
+            _record(key, len(body))
+            return response
+
+        if encoding == "br":
+            out = brotli.compress(body, quality=br_quality, mode=brotli.MODE_TEXT)
+        else:
+            out = gzip.compress(body, compresslevel=gzip_level, mtime=0)
+        if len(out) >= len(body):
+            _record(key, len(body))
+            return response
+
+        response.set_data(out)  # also resets Content-Length
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # a strong validator names exact bytes; the encoded body isn't them
+            response.set_etag(etag, weak=True)
+
+        _record(key, len(body), len(out))
+        metrics.incr(f"compress.{encoding}.responses")
+        return response
@@ -0,0 +1,299 @@
+# images.py
+# Derivatives for generated dream images: decode the model's bytes once, then
+# emit WebP (and AVIF where this Pillow build supports it) at several sizes.
+# Filenames are content-addressed (hash of the source bytes + size + format),
+# so re-running is idempotent and URLs can be cached forever.
+import hashlib
+import io
+import logging
+import os
+import threading
+
+from PIL import Image, features
+
+import blurhash
+
+logger = logging.getLogger("dreamr")
+
+VARIANT_DIR = os.path.join("static", "images", "variants")
+VARIANT_URL = "/static/images/variants"
+DEFAULT_SIZES = (48, 256, 512, 1024)
+
+# format -> (extension, save kwargs)
+_FORMATS = {
+    "webp": ("webp", {"quality": 82, "method": 4}),
+    "avif": ("avif", {"quality": 60, "speed": 6}),
+}
+
+
+def _supported(fmt: str) -> bool:
+    try:
+        return bool(features.check(fmt))
+    except (ValueError, KeyError):
+        return False  # older Pillow doesn't know the feature name at all
+
+
+FORMATS = tuple(f for f in ("webp", "avif") if _supported(f))
+
+
+def content_id(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:20]
+
+
+def decode(data: bytes) -> Image.Image:
+    img = Image.open(io.BytesIO(data))
+    img.load()
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+    return img
+
+
+def _save_atomic(img: Image.Image, path: str, fmt: str, **kwargs) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    img.save(tmp, fmt.upper(), **kwargs)
+    os.replace(tmp, path)
+
+
+PLACEHOLDER_PX = 32   # BlurHash input edge; the encoder is O(pixels x components)
+
+
+def placeholder(img: Image.Image) -> tuple[str, str]:
+    """(BlurHash, dominant colour as #rrggbb) for a decoded image."""
+    small = img.convert("RGB")
+    small.thumbnail((PLACEHOLDER_PX, PLACEHOLDER_PX), Image.BILINEAR)
+    # dominant = most common colour of a 5-colour palette, not the (muddy) mean
+    pal = small.quantize(colors=5)
+    count, index = max(pal.getcolors())
+    r, g, b = pal.getpalette()[index * 3:index * 3 + 3]
+    return blurhash.encode(small), f"#{r:02x}{g:02x}{b:02x}"
+
+
+def placeholder_for_file(path: str) -> tuple[str, str]:
+    with Image.open(path) as img:
+        img.draft("RGB", (PLACEHOLDER_PX * 4, PLACEHOLDER_PX * 4))
+        return placeholder(img)
+
+
+def save_png_thumbnail(img: Image.Image, path: str, size: int) -> None:
+    """Legacy PNG tile (static/images/tiles) from an already-decoded image."""
+    thumb = img.copy()
+    thumb.thumbnail((size, size))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _save_atomic(thumb, path, "png")
+
+
+def build_variants(img: Image.Image, cid: str, sizes=DEFAULT_SIZES, out_dir: str = VARIANT_DIR) -> dict:
+    """
+    Write every size/format of `img` and return {"webp": {"256": "<cid>-256.webp", ...}, ...}
+    (filenames relative to VARIANT_DIR). Sizes larger than the source are
+    skipped; existing files are reused as-is.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    native = max(img.size)
+    variants = {fmt: {} for fmt in FORMATS}
+
+    # largest first, each step resampled from the previous one (fewer pixels to filter)
+    frame = img
+    for size in sorted({min(s, native) for s in sizes}, reverse=True):
+        if max(frame.size) > size:
+            frame = frame.copy()
+            frame.thumbnail((size, size), Image.LANCZOS)
+        for fmt in FORMATS:
+            ext, opts = _FORMATS[fmt]
+            name = f"{cid}-{size}.{ext}"
+            path = os.path.join(out_dir, name)
+            if not os.path.exists(path):
+                try:
+                    _save_atomic(frame, path, fmt, **opts)
+                except Exception as e:
+                    logger.error(f"[ERROR] Failed to write {fmt} variant {name}: {e}")
+                    continue
+            variants[fmt][str(size)] = name
+    return {fmt: v for fmt, v in variants.items() if v}
+
+
+def variant_urls(variants: dict | None) -> dict | None:
+    """Stored variant filenames -> public URLs, same shape."""
+    if not variants:
+        return None
+    return {fmt: {size: f"{VARIANT_URL}/{name}" for size, name in by_size.items()}
+            for fmt, by_size in variants.items()}
+
+
+def remove_variants(variants: dict | None, out_dir: str = VARIANT_DIR) -> None:
+    """Best-effort delete (derivatives can always be rebuilt from the original)."""
+    for by_size in (variants or {}).values():
+        for name in by_size.values():
+            try:
+                os.remove(os.path.join(out_dir, os.path.basename(name)))
+            except OSError:
+                pass
+
+
+
+def expected_variants(cid: str, native: int, sizes=DEFAULT_SIZES) -> dict:
+    """The variant map build_variants would return for this source (without writing)."""
+    return {fmt: {str(size): f"{cid}-{size}.{_FORMATS[fmt][0]}"
+                  for size in sorted({min(s, native) for s in sizes}, reverse=True)}
+            for fmt in FORMATS}
+
+
+def refresh_derivatives(src: str, tile_path: str, *, tile_size: int = 256, sizes=DEFAULT_SIZES,
+                        stored_variants: dict | None = None, want_variants: bool = True,
+                        want_placeholder: bool = False, force: bool = False) -> dict | None:
+    """
+    Bring one original's derivatives up to date (maintenance/backfill path).
+    Up to date = tile no older than the source, and every expected variant
+    (content hash of the source x sizes x formats) present and recorded.
+    Returns None when nothing needed doing, else {"variants", "placeholder"}
+    (either may be None when not requested).
+    """
+    with open(src, "rb") as f:
+        data = f.read()
+    cid = content_id(data)
+
+    if not force and not want_placeholder:
+        try:
+            tile_ok = os.path.getmtime(tile_path) >= os.path.getmtime(src)
+        except OSError:
+            tile_ok = False
+        variants_ok = True
+        if want_variants:
+            with Image.open(io.BytesIO(data)) as probe:   # header only, no decode
+                native = max(probe.size)
+            want = expected_variants(cid, native, sizes)
+            variants_ok = stored_variants == want and all(
+                os.path.exists(os.path.join(VARIANT_DIR, n)) for by in want.values() for n in by.values())
+        if tile_ok and variants_ok:
+            return None
+
+    img = decode(data)
+    save_png_thumbnail(img, tile_path, tile_size)
+    return {
+        "variants": build_variants(img, cid, sizes=sizes) if want_variants else None,
+        "placeholder": placeholder(img) if want_placeholder else None,
+    }
+
+
+# --- on-demand thumbnails (/img/<kind>/<w>x<h>/<file>) ---
+
+MIME = {"webp": "image/webp", "avif": "image/avif", "png": "image/png"}
+
+
+def negotiate_format(accept: str | None) -> str:
+    """Best format the client accepts (AVIF > WebP > PNG)."""
+    accept = accept or ""
+    for fmt in ("avif", "webp"):
+        if fmt in FORMATS and MIME[fmt] in accept:
+            return fmt
+    return "png"
+
+
+class ThumbnailCache:
+    """
+    Size-capped LRU cache of resized images on disk. Entries are keyed by the
+    source file's identity (name, size, mtime) plus box and format, so a key
+    maps to exactly one set of bytes and doubles as a strong ETag. Recency is
+    the file mtime (bumped on hit); eviction drops the oldest until the
+    directory is back under max_bytes. Concurrent misses for the same key in
+    this process share one render; across workers the atomic rename makes a
+    duplicate render harmless.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._locks = {}               # key -> Lock, only while a render is in flight
+        self._locks_guard = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self._bytes = None             # approximate; recounted on eviction
+
+    @staticmethod
+    def key(src: str, w: int, h: int, fmt: str) -> str:
+        st = os.stat(src)
+        ident = f"{os.path.basename(src)}:{st.st_size}:{st.st_mtime_ns}:{w}x{h}:{fmt}"
+        return hashlib.sha256(ident.encode()).hexdigest()[:32]
+
+    def path(self, key: str, fmt: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.{fmt}")
+
+    def get_or_render(self, src: str, w: int, h: int, fmt: str) -> tuple[str, str, bool]:
+        """Returns (path, key, hit). Raises OSError if the source can't be read."""
+        key = self.key(src, w, h, fmt)
+        path = self.path(key, fmt)
+        if self._touch(path):
+            return path, key, True
+
+        with self._locks_guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            try:
+                if self._touch(path):
+                    return path, key, True   # rendered while we waited
+                self._render(src, path, w, h, fmt)
+            finally:
+                with self._locks_guard:
+                    self._locks.pop(key, None)
+
+        self._account(path)
+        return path, key, False
+
+    def _touch(self, path: str) -> bool:
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _render(self, src: str, path: str, w: int, h: int, fmt: str) -> None:
+        with Image.open(src) as img:
+            img.draft("RGB", (w, h))   # JPEG sources decode at reduced scale; no-op otherwise
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+            img.thumbnail((w, h), Image.LANCZOS)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _save_atomic(img, path, fmt, **(_FORMATS[fmt][1] if fmt in _FORMATS else {}))
+
+    def _account(self, path: str) -> None:
+        try:
+            added = os.path.getsize(path)
+        except OSError:
+            return
+        with self._evict_lock:
+            if self._bytes is None:
+                self._bytes = self._scan_total()
+            else:
+                self._bytes += added
+            if self._bytes > self.max_bytes:
+                self._bytes = self._evict()
+
+    def _entries(self):
+        for dirpath, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                p = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                yield st.st_mtime, st.st_size, p
+
+    def _scan_total(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> int:
+        """Oldest-first until under 90% of the cap (headroom so we don't evict on every miss)."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        for _, size, p in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(p)
+                total -= size
+            except OSError:
+                pass
+        logger.info(f"thumbnail cache evicted down to {total} bytes")
+        return total
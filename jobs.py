@@ -0,0 +1,258 @@
+# jobs.py
+from __future__ import annotations  # postpone annotation evaluation
+from typing import TYPE_CHECKING
+
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from quota import refund_text, refund_image
+
+if TYPE_CHECKING:
+    # For editors only; never runs at runtime
+    from app import Job
+
+logger = logging.getLogger("dreamr")
+
+STALE_AFTER = timedelta(minutes=10)   # running this long => the worker died
+WEB_STALE_AFTER = timedelta(minutes=3)  # jobs run inline by a request ("web:" worker) can't outlive gunicorn's timeout
+POLL_INTERVAL = 0.5                   # seconds between queue polls when idle
+
+# kind -> callable(job) -> result dict; filled in by app.py via @register
+HANDLERS = {}
+# kind -> callable(job), run once when a job of that kind is failed (handler
+# error, stale sweep, ...) to settle rows the job was going to fill in
+FAIL_HOOKS = {}
+
+
+def register(kind: str, on_fail=None):
+    def _wrap(fn):
+        HANDLERS[kind] = fn
+        if on_fail is not None:
+            FAIL_HOOKS[kind] = on_fail
+        return fn
+    return _wrap
+
+
+def _models():
+    # late import avoids circular import at module import time
+    from app import db, Job
+    return db, Job
+
+
+def _refund(job: "Job") -> None:
+    """Give back whatever credit was taken when the job was enqueued."""
+    if job.charged == "text":
+        refund_text(job.user_id)
+    elif job.charged == "image":
+        refund_image(job.user_id)
+
+
+def enqueue(kind: str, user_id: int, payload: dict, charged: str | None = None,
+            dedupe_key: str | None = None) -> "Job":
+    """
+    Persist a queued job. `charged` records the credit already deducted by
+    the request ("text" / "image") so a failed job can refund it.
+    `dedupe_key` is unique among unfinished jobs: a second enqueue with the
+    same key raises IntegrityError (see find_inflight).
+    """
+    db, Job = _models()
+    job = Job(kind=kind, user_id=user_id, payload=payload, charged=charged, status="queued",
+              dedupe_key=dedupe_key)
+    db.session.add(job)
+    db.session.commit()
+    logger.info("job_enqueued id=%s kind=%s user_id=%s", job.id, kind, user_id)
+    return job
+
+
+def is_stale(job: "Job", now: datetime | None = None) -> bool:
+    """Running past its limit: whoever claimed it (worker or web process) died."""
+    if job.status != "running" or job.started_at is None:
+        return False
+    limit = WEB_STALE_AFTER if (job.worker or "").startswith("web:") else STALE_AFTER
+    return job.started_at < (now or datetime.utcnow()) - limit
+
+
+def find_inflight(dedupe_key: str) -> "Job | None":
+    """
+    The unfinished job holding `dedupe_key`, if any. A stale holder is failed
+    (and refunded) here, so a dead process can't keep the key forever even
+    when no worker is running fail_stale_jobs().
+    """
+    db, Job = _models()
+    job = Job.query.filter(Job.dedupe_key == dedupe_key,
+                           Job.status.in_(("queued", "running"))).first()
+    if job is not None and is_stale(job):
+        logger.warning("job_stale id=%s kind=%s worker=%s", job.id, job.kind, job.worker)
+        fail(job, "worker lost")
+        return None
+    return job
+
+
+def claim(job: "Job", worker_id: str) -> bool:
+    """Run a specific queued job in this thread (e.g. inline in a request); False if a worker got it first."""
+    db, Job = _models()
+    res = db.session.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.status == "queued")
+        .values(status="running", worker=worker_id, attempts=Job.attempts + 1,
+                started_at=datetime.utcnow())
+    )
+    db.session.commit()
+    db.session.refresh(job)
+    return res.rowcount == 1
+
+
+def wait(job: "Job", timeout: float) -> "Job":
+    """Poll until the job is done/failed or `timeout` seconds pass; returns the refreshed job."""
+    db, _ = _models()
+    deadline = time.monotonic() + timeout
+    while job.status in ("queued", "running") and not is_stale(job) and time.monotonic() < deadline:
+        time.sleep(0.5)
+        db.session.rollback()  # end the read snapshot so the other side's commit is visible
+    if is_stale(job):
+        fail(job, "worker lost")
+    return job
+
+
+def claim_next(worker_id: str) -> "Job | None":
+    """Atomically move the oldest queued job to running (SKIP LOCKED across workers)."""
+    db, Job = _models()
+    job = db.session.execute(
+        select(Job)
+        .where(Job.status == "queued")
+        .order_by(Job.created_at.asc())
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).scalars().first()
+    if not job:
+        db.session.rollback()
+        return None
+    job.status = "running"
+    job.worker = worker_id
+    job.attempts = (job.attempts or 0) + 1
+    job.started_at = datetime.utcnow()
+    db.session.commit()
+    return job
+
+
+def complete(job: "Job", result: dict) -> None:
+    db, Job = _models()
+    res = db.session.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.status == "running")
+        .values(status="done", result=result, finished_at=datetime.utcnow(), dedupe_key=None)
+    )
+    db.session.commit()
+    if res.rowcount != 1:
+        logger.warning("job_complete_ignored id=%s (already settled)", job.id)
+
+
+def fail(job: "Job", error: str) -> None:
+    """Mark failed and refund; the guarded UPDATE makes sure we refund at most once."""
+    db, Job = _models()
+    db.session.rollback()
+    res = db.session.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.status.in_(("queued", "running")))
+        .values(status="failed", error=(error or "failed")[:255], finished_at=datetime.utcnow(),
+                dedupe_key=None)
+    )
+    db.session.commit()
+    if res.rowcount != 1:
+        return
+    try:
+        _refund(job)
+    except Exception:
+        db.session.rollback()
+        logger.error("job_refund_failed id=%s user_id=%s", job.id, job.user_id, exc_info=True)
+    hook = FAIL_HOOKS.get(job.kind)
+    if hook is not None:
+        try:
+            hook(job)
+        except Exception:
+            db.session.rollback()
+            logger.error("job_fail_hook_failed id=%s kind=%s", job.id, job.kind, exc_info=True)
+
+
+def run_job(job: "Job") -> None:
+    handler = HANDLERS.get(job.kind)
+    if handler is None:
+        fail(job, f"unknown job kind: {job.kind}")
+        return
+    t0 = time.monotonic()
+    try:
+        result = handler(job)
+    except Exception as e:
+        logger.error("job_failed id=%s kind=%s", job.id, job.kind, exc_info=True)
+        fail(job, getattr(e, "public_message", None) or "generation failed")
+        return
+    complete(job, result or {})
+    logger.info("job_done id=%s kind=%s secs=%.2f", job.id, job.kind, time.monotonic() - t0)
+
+
+def fail_stale_jobs() -> int:
+    """Jobs stuck in running past their limit (see is_stale) belonged to a dead process: fail + refund."""
+    db, Job = _models()
+    now = datetime.utcnow()
+    candidates = (Job.query
+                  .filter(Job.status == "running", Job.started_at < now - min(STALE_AFTER, WEB_STALE_AFTER))
+                  .all())
+    stale = [job for job in candidates if is_stale(job, now)]
+    for job in stale:
+        fail(job, "worker lost")
+    return len(stale)
+
+
+def run_worker(app, threads: int = 4, once: bool = False) -> None:
+    """Pull jobs with `threads` concurrent slots until interrupted."""
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    stop = threading.Event()
+
+    def slot(n: int):
+        while not stop.is_set():
+            with app.app_context():
+                try:
+                    job = claim_next(f"{worker_id}/{n}")
+                    if job is None:
+                        if once:
+                            return
+                        time.sleep(POLL_INTERVAL)
+                        continue
+                    run_job(job)
+                except Exception:
+                    logger.error("worker slot %s crashed; continuing", n, exc_info=True)
+                    time.sleep(POLL_INTERVAL)
+                finally:
+                    _models()[0].session.remove()
+
+    with app.app_context():
+        n = fail_stale_jobs()
+        if n:
+            logger.warning("failed %d stale job(s) from a previous worker", n)
+
+    logger.info("job worker %s starting with %d thread(s)", worker_id, threads)
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="job") as pool:
+        try:
+            for n in range(threads):
+                pool.submit(slot, n)
+            last_sweep = time.monotonic()
+            while not once and not stop.is_set():
+                time.sleep(1)
+                if time.monotonic() - last_sweep >= 60:
+                    last_sweep = time.monotonic()
+                    with app.app_context():
+                        try:
+                            fail_stale_jobs()
+                        finally:
+                            _models()[0].session.remove()
+        except KeyboardInterrupt:
+            logger.info("job worker %s stopping", worker_id)
+        finally:
+            stop.set()
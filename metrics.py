@@ -0,0 +1,35 @@
+# metrics.py
+# Process-local counters/timings, exposed as JSON on /admin/metrics.
+# Each gunicorn worker keeps its own numbers; scrape every worker or sum them.
+import threading
+
+_lock = threading.Lock()
+_counters = {}   # name -> number
+_timings = {}    # name -> {"count", "sum", "max"}
+
+
+def incr(name: str, value=1) -> None:
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name: str, value: float) -> None:
+    """Record one sample (e.g. milliseconds) under `name`."""
+    with _lock:
+        t = _timings.get(name)
+        if t is None:
+            t = _timings[name] = {"count": 0, "sum": 0.0, "max": 0.0}
+        t["count"] += 1
+        t["sum"] += value
+        if value > t["max"]:
+            t["max"] = value
+
+
+def snapshot(prefix: str | None = None) -> dict:
+    with _lock:
+        counters = {k: v for k, v in _counters.items() if not prefix or k.startswith(prefix)}
+        timings = {
+            k: {**v, "avg": (v["sum"] / v["count"]) if v["count"] else 0.0}
+            for k, v in _timings.items() if not prefix or k.startswith(prefix)
+        }
+    return {"counters": counters, "timings": timings}
@@ -0,0 +1,40 @@
+"""add dream.has_real_image + gallery index; dream.hidden NOT NULL
+
+Revision ID: 0a6d4e9c3b27
+Revises: f8c3d7a2b591
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a6d4e9c3b27'
+down_revision = 'f8c3d7a2b591'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('dream', sa.Column('has_real_image', sa.Boolean(), nullable=False, server_default=sa.text('0')))
+    # same rule as Dream.is_real_image(): non-empty and not a placeholder
+    op.execute(
+        "UPDATE dream SET has_real_image = 1 "
+        "WHERE image_file IS NOT NULL AND TRIM(image_file) <> '' "
+        "AND LOWER(image_file) NOT LIKE '%placehold%'"
+    )
+
+    # hidden = NULL meant visible; make it a plain 0/1 so the index can use equality
+    op.execute("UPDATE dream SET hidden = 0 WHERE hidden IS NULL")
+    op.alter_column('dream', 'hidden', existing_type=sa.Boolean(), nullable=False,
+                    server_default=sa.text('0'))
+
+    op.create_index('ix_dream_gallery', 'dream',
+                    ['user_id', 'hidden', 'is_question', 'has_real_image', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_dream_gallery', table_name='dream')
+    op.alter_column('dream', 'hidden', existing_type=sa.Boolean(), nullable=True, server_default=None)
+    op.drop_column('dream', 'has_real_image')
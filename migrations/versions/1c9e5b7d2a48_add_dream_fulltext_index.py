@@ -0,0 +1,26 @@
+"""add FULLTEXT index on dream text/analysis/summary/notes for search
+
+Revision ID: 1c9e5b7d2a48
+Revises: 0a6d4e9c3b27
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1c9e5b7d2a48'
+down_revision = '0a6d4e9c3b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # column list must match the MATCH(...) in search.FulltextBackend exactly
+    op.create_index('ft_dream_search', 'dream', ['text', 'analysis', 'summary', 'notes'],
+                    unique=False, mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    op.drop_index('ft_dream_search', table_name='dream')
@@ -0,0 +1,44 @@
+"""add jobs table for queued LLM work
+
+Revision ID: 3b7d2e9a1c40
+Revises: c8a91e2d4b6f
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7d2e9a1c40'
+down_revision = 'c8a91e2d4b6f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.String(length=36), primary_key=True),
+        sa.Column('kind', sa.String(length=32), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('payload', mysql.JSON(), nullable=True),
+        sa.Column('result', mysql.JSON(), nullable=True),
+        sa.Column('error', sa.String(length=255), nullable=True),
+        sa.Column('charged', sa.String(length=16), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column('worker', sa.String(length=128), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_jobs_user_id', 'jobs', ['user_id'], unique=False)
+    op.create_index('ix_jobs_status_created', 'jobs', ['status', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_jobs_status_created', table_name='jobs')
+    op.drop_index('ix_jobs_user_id', table_name='jobs')
+    op.drop_table('jobs')
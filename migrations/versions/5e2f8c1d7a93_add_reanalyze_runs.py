@@ -0,0 +1,37 @@
+"""add reanalyze_runs checkpoint table
+
+Revision ID: 5e2f8c1d7a93
+Revises: 3b7d2e9a1c40
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2f8c1d7a93'
+down_revision = '3b7d2e9a1c40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'reanalyze_runs',
+        sa.Column('name', sa.String(length=64), primary_key=True),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('filters', mysql.JSON(), nullable=True),
+        sa.Column('last_dream_id', sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column('processed', sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column('updated', sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column('failed', sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column('elapsed_secs', sa.Float(), nullable=False, server_default=sa.text("0")),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('reanalyze_runs')
@@ -0,0 +1,36 @@
+"""add discuss_summary for rolling discussion summaries
+
+Revision ID: 7c4a1e9b2d58
+Revises: 5e2f8c1d7a93
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4a1e9b2d58'
+down_revision = '5e2f8c1d7a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'discuss_summary',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('dream_id', sa.Integer(), sa.ForeignKey('dream.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('summary', sa.Text(), nullable=False),
+        sa.Column('through_discuss_id', sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column('turns_covered', sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.UniqueConstraint('dream_id', 'user_id', name='uq_discuss_summary_dream_user'),
+    )
+    op.create_index('ix_discuss_summary_user_id', 'discuss_summary', ['user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_discuss_summary_user_id', table_name='discuss_summary')
+    op.drop_table('discuss_summary')
@@ -0,0 +1,25 @@
+"""add reanalyze_runs.failed_ids (dreams to retry after the main pass)
+
+Revision ID: 7d4a2c9e6b15
+Revises: 1c9e5b7d2a48
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = '7d4a2c9e6b15'
+down_revision = '1c9e5b7d2a48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('reanalyze_runs', sa.Column('failed_ids', mysql.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('reanalyze_runs', 'failed_ids')
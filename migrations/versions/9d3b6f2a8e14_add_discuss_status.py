@@ -0,0 +1,26 @@
+"""add discuss.status (pending / complete / failed)
+
+Revision ID: 9d3b6f2a8e14
+Revises: 7c4a1e9b2d58
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3b6f2a8e14'
+down_revision = '7c4a1e9b2d58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('discuss', sa.Column('status', sa.String(length=16), nullable=False, server_default='complete'))
+    # rows that never got a reply were failures
+    op.execute("UPDATE discuss SET status = 'failed' WHERE response IS NULL")
+
+
+def downgrade():
+    op.drop_column('discuss', 'status')
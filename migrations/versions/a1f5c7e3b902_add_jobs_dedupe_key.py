@@ -0,0 +1,27 @@
+"""add jobs.dedupe_key for single-flight jobs
+
+Revision ID: a1f5c7e3b902
+Revises: 9d3b6f2a8e14
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1f5c7e3b902'
+down_revision = '9d3b6f2a8e14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # unique among unfinished jobs only: finished jobs set it back to NULL
+    op.add_column('jobs', sa.Column('dedupe_key', sa.String(length=64), nullable=True))
+    op.create_index('uq_jobs_dedupe_key', 'jobs', ['dedupe_key'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_jobs_dedupe_key', table_name='jobs')
+    op.drop_column('jobs', 'dedupe_key')
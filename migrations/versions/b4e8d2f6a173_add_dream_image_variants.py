@@ -0,0 +1,26 @@
+"""add dream.image_variants (webp/avif derivative filenames)
+
+Revision ID: b4e8d2f6a173
+Revises: a1f5c7e3b902
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4e8d2f6a173'
+down_revision = 'a1f5c7e3b902'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # NULL until scripts/backfill_images.py (or a new generation) fills it
+    op.add_column('dream', sa.Column('image_variants', mysql.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('dream', 'image_variants')
@@ -0,0 +1,27 @@
+"""add dream.image_blurhash / image_color placeholders
+
+Revision ID: c7a2e5f9b318
+Revises: b4e8d2f6a173
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7a2e5f9b318'
+down_revision = 'b4e8d2f6a173'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # existing rows: scripts/backfill_placeholders.py
+    op.add_column('dream', sa.Column('image_blurhash', sa.String(length=64), nullable=True))
+    op.add_column('dream', sa.Column('image_color', sa.String(length=7), nullable=True))
+
+
+def downgrade():
+    op.drop_column('dream', 'image_color')
+    op.drop_column('dream', 'image_blurhash')
@@ -0,0 +1,30 @@
+"""add (user_id, created_at, id) index for dream list pagination
+
+Revision ID: d3f9a6c1e254
+Revises: c7a2e5f9b318
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3f9a6c1e254'
+down_revision = 'c7a2e5f9b318'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # serves WHERE user_id = ? ORDER BY created_at DESC, id DESC (+ cursor range) without a filesort
+    op.create_index('ix_dream_user_created_id', 'dream', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    # MySQL/MariaDB may have dropped the implicit FK index on user_id once this one
+    # covered it; recreate one first or the FK blocks the drop
+    indexes = sa.inspect(op.get_bind()).get_indexes('dream')
+    if not any(ix['column_names'][:1] == ['user_id'] and ix['name'] != 'ix_dream_user_created_id' for ix in indexes):
+        op.create_index('ix_dream_user_id', 'dream', ['user_id'], unique=False)
+    op.drop_index('ix_dream_user_created_id', table_name='dream')
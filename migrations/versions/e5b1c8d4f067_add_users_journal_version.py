@@ -0,0 +1,24 @@
+"""add users.journal_version (list endpoint ETags)
+
+Revision ID: e5b1c8d4f067
+Revises: d3f9a6c1e254
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b1c8d4f067'
+down_revision = 'd3f9a6c1e254'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('journal_version', sa.Integer(), nullable=False, server_default=sa.text('0')))
+
+
+def downgrade():
+    op.drop_column('users', 'journal_version')
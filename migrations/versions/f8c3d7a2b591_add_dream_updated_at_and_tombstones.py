@@ -0,0 +1,41 @@
+"""add dream.updated_at and dream_tombstone for delta sync
+
+Revision ID: f8c3d7a2b591
+Revises: e5b1c8d4f067
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f8c3d7a2b591'
+down_revision = 'e5b1c8d4f067'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('dream', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    # best guess for existing rows: last notes edit, else creation
+    op.execute("UPDATE dream SET updated_at = COALESCE(notes_updated_at, created_at, UTC_TIMESTAMP())")
+    op.alter_column('dream', 'updated_at', existing_type=sa.DateTime(), nullable=False)
+    op.create_index('ix_dream_user_updated_id', 'dream', ['user_id', 'updated_at', 'id'], unique=False)
+
+    op.create_table(
+        'dream_tombstone',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('dream_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_dream_tombstone_user_deleted', 'dream_tombstone', ['user_id', 'deleted_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_dream_tombstone_user_deleted', table_name='dream_tombstone')
+    op.drop_table('dream_tombstone')
+    op.drop_index('ix_dream_user_updated_id', table_name='dream')
+    op.drop_column('dream', 'updated_at')
@@ -0,0 +1,194 @@
+# model_router.py
+# Picks the model for each OpenAI operation (analysis, discussion, thread
+# summary, image-prompt rewrite, image) from config, by user tier and input
+# size, with a fallback chain, and records latency/token usage per route on
+# top of the gateway.
+import logging
+import re
+import time
+
+import openai
+
+import metrics
+from openai_gateway import AIUnavailableError
+
+logger = logging.getLogger("dreamr")
+
+# op -> tier -> ordered model chain (first is primary, rest are fallbacks).
+# Tier lookup order: "<tier>_short" (input under SHORT_INPUT_CHARS), "<tier>", "default".
+# Override any part with DREAMR_MODEL_ROUTES='{"analysis": {"free": ["gpt-4o-mini"]}}'.
+DEFAULT_ROUTES = {
+    "analysis": {
+        "pro": ["gpt-4o", "gpt-4o-mini"],
+        "free": ["gpt-4o", "gpt-4o-mini"],
+        "free_short": ["gpt-4o-mini", "gpt-4o"],
+    },
+    "discussion": {
+        "pro": ["gpt-4o", "gpt-4o-mini"],
+        "free": ["gpt-4o", "gpt-4o-mini"],
+    },
+    "discuss_summary": {
+        "default": ["gpt-4o-mini", "gpt-4o"],
+    },
+    "image_prompt": {
+        "default": ["gpt-4o-mini", "gpt-4o"],
+    },
+    "image": {
+        "default": ["gpt-image-1.5", "gpt-image-1"],
+    },
+}
+SHORT_INPUT_CHARS = 600
+
+_POLICY_CODES = {"content_policy_violation", "moderation_blocked", "content_filter"}
+_MODEL_MENTION = re.compile(r"\bmodels?\b", re.IGNORECASE)
+
+
+def _should_fall_back(e: "openai.OpenAIError") -> bool:
+    """
+    Could another model in the chain succeed where this one failed? Yes for
+    errors about the model itself (not found, no access, deprecated or
+    unsupported) and for transient ones the gateway gave up on; no for
+    content-policy and auth failures, which every model would repeat.
+    """
+    if isinstance(e, openai.AuthenticationError):
+        return False
+    code = str(getattr(e, "code", None) or "")
+    if code in _POLICY_CODES:
+        return False
+    if isinstance(e, (openai.NotFoundError, openai.PermissionDeniedError)):
+        return True   # model_not_found / this key can't use this model
+    if isinstance(e, openai.BadRequestError):
+        return ("model" in code or getattr(e, "param", None) == "model"
+                or bool(_MODEL_MENTION.search(getattr(e, "message", None) or str(e))))
+    return isinstance(e, (openai.APITimeoutError, openai.APIConnectionError,
+                          openai.RateLimitError, openai.InternalServerError))
+
+
+def _cache_hint(kwargs: dict, prompt_cache_key: str | None) -> None:
+    if prompt_cache_key:
+        extra = dict(kwargs.get("extra_body") or {})
+        extra["prompt_cache_key"] = prompt_cache_key
+        kwargs["extra_body"] = extra
+
+
+class ModelRouter:
+    def __init__(self, gateway, routes: dict | None = None, short_input_chars: int = SHORT_INPUT_CHARS):
+        self.gateway = gateway
+        self.short_input_chars = short_input_chars
+        self.routes = {op: dict(tiers) for op, tiers in DEFAULT_ROUTES.items()}
+        for op, tiers in (routes or {}).items():
+            self.routes.setdefault(op, {}).update(tiers)
+
+    def route(self, op: str, *, pro: bool | None = None, input_chars: int | None = None) -> tuple[str, list[str]]:
+        """Returns (route name, model chain), e.g. ("analysis.free_short", ["gpt-4o-mini", "gpt-4o"])."""
+        tiers = self.routes.get(op)
+        if not tiers:
+            raise KeyError(f"no model route for {op!r}")
+        tier = None if pro is None else ("pro" if pro else "free")
+        candidates = []
+        if tier:
+            if input_chars is not None and input_chars < self.short_input_chars:
+                candidates.append(f"{tier}_short")
+            candidates.append(tier)
+        candidates.append("default")
+        for name in candidates:
+            if tiers.get(name):
+                return f"{op}.{name}", list(tiers[name])
+        # no tier matched: first configured chain
+        name, chain = next(iter(tiers.items()))
+        return f"{op}.{name}", list(chain)
+
+    # --- calls ---
+    # prompt_cache_key groups requests sharing a prompt prefix so the provider's
+    # prompt cache can serve them (sent via extra_body: older SDKs lack the kwarg)
+    def chat(self, op: str, *, pro: bool | None = None, input_chars: int | None = None,
+             prompt_cache_key: str | None = None, **kwargs):
+        route, chain = self.route(op, pro=pro, input_chars=input_chars)
+        _cache_hint(kwargs, prompt_cache_key)
+        return self._with_fallback(route, chain, lambda model: self.gateway.chat(model=model, **kwargs))
+
+    def images(self, op: str = "image", *, pro: bool | None = None, **kwargs):
+        route, chain = self.route(op, pro=pro)
+        return self._with_fallback(route, chain, lambda model: self.gateway.images(model=model, **kwargs))
+
+    def stream_chat(self, op: str, *, pro: bool | None = None, input_chars: int | None = None,
+                    prompt_cache_key: str | None = None, **kwargs):
+        """
+        Streamed chat. Falls back only while opening the stream; once tokens
+        flow we are committed to that model.
+        """
+        route, chain = self.route(op, pro=pro, input_chars=input_chars)
+        _cache_hint(kwargs, prompt_cache_key)
+        kwargs.setdefault("stream_options", {"include_usage": True})
+        t0 = time.monotonic()
+        stream, model = self._with_fallback(
+            route, chain,
+            lambda m: (self.gateway.stream_chat(model=m, **kwargs), m),
+            record=False,
+        )
+        return self._measure_stream(route, model, stream, t0)
+
+    def stats(self) -> dict:
+        snap = metrics.snapshot("route.")
+        counters = snap["counters"]
+        for key in [k for k in counters if k.endswith(".prompt_tokens")]:
+            base = key[:-len(".prompt_tokens")]
+            if counters[key]:
+                snap.setdefault("cache_hit_rate", {})[base] = round(
+                    counters.get(base + ".cached_tokens", 0) / counters[key], 3)
+        snap["routes"] = self.routes
+        snap["short_input_chars"] = self.short_input_chars
+        return snap
+
+    # --- internals ---
+    def _with_fallback(self, route: str, chain: list[str], call, record: bool = True):
+        if not chain:
+            raise ValueError(f"model route {route} has no models configured")
+        last = None
+        for i, model in enumerate(chain):
+            if i:
+                metrics.incr(f"route.{route}.fallbacks")
+                logger.warning(f"[model route] {route}: {chain[i - 1]} failed ({last}); trying {model}")
+            t0 = time.monotonic()
+            try:
+                result = call(model)
+            except AIUnavailableError:
+                raise  # breaker/limiter are shared by every model; another one won't help
+            except openai.OpenAIError as e:
+                metrics.incr(f"route.{route}.{model}.errors")
+                if not _should_fall_back(e):
+                    raise  # content policy, auth, ...: every model would answer the same
+                last = e
+                continue
+            if record:
+                self._record(route, model, (time.monotonic() - t0) * 1000.0, getattr(result, "usage", None))
+            return result
+        raise last
+
+    def _record(self, route: str, model: str, ms: float, usage) -> None:
+        key = f"route.{route}.{model}"
+        metrics.incr(f"{key}.calls")
+        metrics.observe(f"{key}.latency_ms", ms)
+        if usage is None:
+            return
+        # chat: prompt/completion tokens; images: input/output tokens
+        for field in ("prompt_tokens", "completion_tokens", "input_tokens", "output_tokens", "total_tokens"):
+            n = getattr(usage, field, None)
+            if n:
+                metrics.incr(f"{key}.{field}", n)
+        # prompt-prefix cache hits (chat only)
+        cached = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None)
+        if cached:
+            metrics.incr(f"{key}.cached_tokens", cached)
+
+    def _measure_stream(self, route: str, model: str, stream, t0: float):
+        usage = None
+        first = None
+        for chunk in stream:
+            if first is None and chunk.choices:
+                first = time.monotonic()
+                metrics.observe(f"route.{route}.{model}.first_token_ms", (first - t0) * 1000.0)
+            if getattr(chunk, "usage", None) is not None:
+                usage = chunk.usage
+            yield chunk
+        self._record(route, model, (time.monotonic() - t0) * 1000.0, usage)
@@ -0,0 +1,300 @@
+# openai_gateway.py
+# One wrapper for every OpenAI call in the process: a shared concurrency
+# limit, jittered exponential backoff that honours Retry-After, and a circuit
+# breaker that fails fast while OpenAI is degraded.
+import contextlib
+import logging
+import random
+import threading
+import time
+
+import openai
+
+import metrics
+
+logger = logging.getLogger("dreamr")
+
+_local = threading.local()
+
+
+class AIUnavailableError(Exception):
+    """OpenAI is not being called right now; routes answer 503."""
+    public_message = "AI service temporarily unavailable"
+
+    def __init__(self, message: str, retry_after: float = 5.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(AIUnavailableError):
+    pass
+
+
+class GatewayBusyError(AIUnavailableError):
+    pass
+
+
+class DeadlineExceededError(AIUnavailableError):
+    pass
+
+
+@contextlib.contextmanager
+def deadline(seconds: float):
+    """
+    Bound every gateway call this thread makes inside the block, retries and
+    backoff included (e.g. work done inline in a request under gunicorn's timeout).
+    """
+    prev = getattr(_local, "deadline", None)
+    ends = time.monotonic() + seconds
+    _local.deadline = ends if prev is None else min(prev, ends)
+    try:
+        yield
+    finally:
+        _local.deadline = prev
+
+
+def _time_left() -> float | None:
+    """Seconds left under this thread's deadline; None when unbounded."""
+    ends = getattr(_local, "deadline", None)
+    return None if ends is None else ends - time.monotonic()
+
+
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def _is_retryable(e: Exception) -> bool:
+    if isinstance(e, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    if isinstance(e, openai.APIStatusError):
+        return e.status_code in _RETRYABLE_STATUS
+    return False
+
+
+def _retry_after_seconds(e: Exception) -> float | None:
+    resp = getattr(e, "response", None)
+    headers = getattr(resp, "headers", None)
+    if not headers:
+        return None
+    try:
+        ms = headers.get("retry-after-ms")
+        if ms:
+            return float(ms) / 1000.0
+        s = headers.get("retry-after")
+        if s:
+            return float(s)
+    except (TypeError, ValueError):
+        return None  # HTTP-date form; fall back to our own backoff
+    return None
+
+
+def _bounded(kwargs: dict) -> dict:
+    """Per-request SDK timeout no longer than what's left of the deadline."""
+    left = _time_left()
+    if left is None:
+        return kwargs
+    if left <= 0:
+        metrics.incr("openai.deadline_exceeded")
+        raise DeadlineExceededError("OpenAI call deadline exceeded")
+    timeout = kwargs.get("timeout")
+    return {**kwargs, "timeout": left if not isinstance(timeout, (int, float)) else min(timeout, left)}
+
+
+class CircuitBreaker:
+    """closed -> open after `threshold` consecutive failures; one trial call after `cooldown`."""
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def before_call(self) -> bool:
+        """Raise while open; True if the caller now holds the half-open trial."""
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            remaining = self.cooldown - (time.monotonic() - self._opened_at)
+            if remaining > 0 or self._trial_in_flight:
+                metrics.incr("openai.short_circuits")
+                raise CircuitOpenError("OpenAI circuit open", retry_after=max(remaining, 1.0))
+            self._trial_in_flight = True  # half-open: let exactly one call through
+            return True
+
+    def release_trial(self) -> None:
+        """The trial ended without telling us anything about OpenAI; let the next call try."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("openai circuit closed")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            reopen = self._trial_in_flight
+            self._trial_in_flight = False
+            if reopen or (self._opened_at is None and self._failures >= self.threshold):
+                self._opened_at = time.monotonic()
+                metrics.incr("openai.breaker_trips")
+                logger.warning("openai circuit opened after %d consecutive failures", self._failures)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.cooldown:
+                return "half_open"
+            return "open"
+
+
+class OpenAIGateway:
+    def __init__(self, client, *, max_concurrency: int = 16, acquire_timeout: float = 30.0,
+                 max_retries: int = 3, base_delay: float = 1.0, max_delay: float = 20.0,
+                 breaker_threshold: int = 5, breaker_cooldown: float = 30.0):
+        # the SDK's own retries would stack on top of ours
+        self.client = client.with_options(max_retries=0)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.acquire_timeout = acquire_timeout
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+
+    # --- public calls ---
+    def chat(self, **kwargs):
+        return self._call("chat", lambda: self.client.chat.completions.create(**_bounded(kwargs)))
+
+    def images(self, **kwargs):
+        return self._call("images", lambda: self.client.images.generate(**_bounded(kwargs)))
+
+    def stream_chat(self, **kwargs):
+        """
+        Streamed chat completion. Retries only while opening the stream; the
+        concurrency slot is held until the caller finishes iterating.
+        """
+        trial = self._acquire()
+        try:
+            stream, trial = self._with_retries(
+                "chat_stream", lambda: self.client.chat.completions.create(stream=True, **_bounded(kwargs)), trial)
+        except BaseException:
+            self._release()
+            raise
+        return self._drain(stream, trial)
+
+    def stats(self) -> dict:
+        snap = metrics.snapshot("openai.")
+        snap["breaker_state"] = self.breaker.state
+        snap["max_concurrency"] = self.max_concurrency
+        return snap
+
+    # --- internals ---
+    def _drain(self, stream, trial: bool):
+        settled = False
+        try:
+            for chunk in stream:
+                yield chunk
+            self.breaker.record_success()
+            settled = True
+        except Exception as e:
+            settled = self._record_error(e)
+            raise
+        finally:
+            # abandoned mid-stream (GeneratorExit) or a non-API error: no verdict
+            if trial and not settled:
+                self.breaker.release_trial()
+            self._release()
+
+    def _call(self, op: str, fn):
+        trial = self._acquire()
+        try:
+            result, _ = self._with_retries(op, fn, trial)
+            return result
+        finally:
+            self._release()
+
+    def _acquire(self) -> bool:
+        left = _time_left()
+        trial = self.breaker.before_call()
+        t0 = time.monotonic()
+        got = self._slots.acquire(
+            timeout=self.acquire_timeout if left is None else max(0.0, min(self.acquire_timeout, left)))
+        waited_ms = (time.monotonic() - t0) * 1000.0
+        metrics.observe("openai.queue_wait_ms", waited_ms)
+        if not got:
+            if trial:
+                self.breaker.release_trial()
+            metrics.incr("openai.queue_timeouts")
+            raise GatewayBusyError("OpenAI concurrency limit reached", retry_after=5.0)
+        metrics.incr("openai.in_flight")
+        return trial
+
+    def _release(self) -> None:
+        metrics.incr("openai.in_flight", -1)
+        self._slots.release()
+
+    def _record_error(self, e: Exception) -> bool:
+        """Tell the breaker what `e` says about OpenAI; False if it says nothing."""
+        if _is_retryable(e):
+            self.breaker.record_failure()
+            return True
+        if isinstance(e, openai.APIStatusError):
+            # 400 content policy, 401, 404...: OpenAI answered, it just said no
+            self.breaker.record_success()
+            return True
+        return False
+
+    def _with_retries(self, op: str, fn, trial: bool = False):
+        """
+        Returns (result, trial). `trial` says whether this call holds the
+        breaker's half-open trial; it is always settled or released here,
+        except for an opened stream, whose verdict comes from _drain.
+        """
+        attempt = 0
+        try:
+            while True:
+                metrics.incr(f"openai.calls.{op}")
+                try:
+                    result = fn()
+                except Exception as e:
+                    if not _is_retryable(e):
+                        metrics.incr(f"openai.errors.{op}")
+                        if self._record_error(e):
+                            trial = False
+                        raise
+                    self.breaker.record_failure()
+                    trial = False
+                    if attempt >= self.max_retries:
+                        metrics.incr(f"openai.errors.{op}")
+                        raise
+                    # full jitter, but never sooner than the server asked for
+                    delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+                    hinted = _retry_after_seconds(e)
+                    if hinted is not None:
+                        delay = max(delay, min(hinted, self.max_delay))
+                    left = _time_left()
+                    if left is not None and delay >= left:
+                        metrics.incr(f"openai.errors.{op}")
+                        raise  # no time left for another attempt
+                    attempt += 1
+                    metrics.incr("openai.retries")
+                    logger.warning(f"[GPT Retry] {op} attempt {attempt} failed: {e}; sleeping {delay:.2f}s")
+                    time.sleep(delay)
+                    trial = self.breaker.before_call()  # stop retrying once the breaker has opened
+                    continue
+                if op != "chat_stream":
+                    self.breaker.record_success()
+                    trial = False
+                return result, trial
+        except BaseException:
+            if trial:
+                self.breaker.release_trial()
+            raise
@@ -97,6 +97,20 @@ Your role is to:
 """,
 
 
+    "discuss_summary": """You maintain a running summary of a conversation about one dream.
+
+You will be given:
+- the original dream
+- the existing summary (may be empty)
+- new discussion turns that happened after it
+
+Rewrite the summary so it covers the existing summary and the new turns together.
+Keep: personal context the user shared, questions they asked, interpretations and advice already given, and anything they agreed with or pushed back on.
+Drop greetings, repetition and wording details.
+Write plain prose, no headings or lists, under 200 words, in the same language as the conversation.
+""",
+
+
     
 
 # Images
@@ -0,0 +1,220 @@
+# reanalyze.py
+# Bulk re-analysis of stored dreams after a prompt / interpreter change.
+# Streams Dream rows by id (keyset), calls the model with bounded concurrency,
+# and writes each batch + the run checkpoint in one transaction, so a crashed
+# run resumes from the last committed batch. Dreams that fail are recorded in
+# failed_ids for a retry pass; if OpenAI itself is unavailable the run pauses
+# without moving the checkpoint. Used by scripts/reanalyze_dreams.py and the
+# "reanalyze" job kind.
+from __future__ import annotations  # postpone annotation evaluation
+from typing import TYPE_CHECKING
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import or_
+
+from openai_gateway import AIUnavailableError
+
+if TYPE_CHECKING:
+    # For editors only; never runs at runtime
+    from app import ReanalyzeRun
+
+logger = logging.getLogger("dreamr")
+
+DECLINE_PLACEHOLDER = "placeholders/decline.png"   # non-dream entries; nothing to re-analyze
+
+
+def _app():
+    # late import avoids circular import at module import time
+    import app
+    return app
+
+
+def get_or_start_run(name: str, filters: dict, reset: bool = False) -> "ReanalyzeRun":
+    a = _app()
+    run = a.ReanalyzeRun.query.get(name)
+    if run is not None and not reset:
+        if run.filters != filters:
+            raise ValueError(f"run {name!r} was started with filters {run.filters}; use reset or a new name")
+        run.status = "running"
+        a.db.session.commit()
+        return run
+    if run is None:
+        run = a.ReanalyzeRun(name=name)
+        a.db.session.add(run)
+    run.filters = filters
+    run.status = "running"
+    run.last_dream_id = int(filters.get("min_id") or 0)
+    run.failed_ids = []
+    run.processed = run.updated = run.failed = 0
+    run.elapsed_secs = 0.0
+    a.db.session.commit()
+    return run
+
+
+def _next_batch(run: "ReanalyzeRun", batch_size: int) -> list:
+    a = _app()
+    Dream = a.Dream
+    f = run.filters or {}
+    q = (Dream.query
+         .filter(Dream.id > run.last_dream_id, Dream.text.isnot(None))
+         .filter(or_(Dream.image_file.is_(None), Dream.image_file != DECLINE_PLACEHOLDER))
+         # hidden and never analyzed: failed validation (non-dream entry), not worth a model call
+         .filter(or_(Dream.hidden == False, Dream.analysis.isnot(None))))
+    if f.get("user_id"):
+        q = q.filter(Dream.user_id == f["user_id"])
+    if f.get("interpreter_id"):
+        q = q.filter(Dream.interpreter_id == f["interpreter_id"])
+    if f.get("max_id"):
+        q = q.filter(Dream.id <= f["max_id"])
+    return q.order_by(Dream.id.asc()).limit(batch_size).all()
+
+
+def _retry_batch(ids) -> list:
+    a = _app()
+    return a.Dream.query.filter(a.Dream.id.in_(list(ids))).order_by(a.Dream.id.asc()).all() if ids else []
+
+
+def _prompts_for(batch: list) -> dict:
+    """dream_id -> (messages, prompt cache key), built on this thread (needs the DB session)."""
+    a = _app()
+    overlays = {}
+    prompts = {}
+    for d in batch:
+        if d.interpreter_id not in overlays:
+            interp = a.Interpreter.query.get(d.interpreter_id) if d.interpreter_id else None
+            overlays[d.interpreter_id] = a._interpreter_overlay(interp)
+        overlay = overlays[d.interpreter_id]
+        prompts[d.id] = (a._build_analysis_messages(d.user_id, d.text, overlay),
+                         a._prompt_cache_key("analysis", overlay))
+    return prompts
+
+
+def _call_model(messages: list, cache_key: str) -> str:
+    # no DB access here: runs on the pool threads
+    response = _app().router.chat("analysis", pro=True, prompt_cache_key=cache_key, messages=messages)
+    if not getattr(response, "choices", None) or not response.choices[0].message:
+        raise RuntimeError("AI response was empty")
+    return response.choices[0].message.content.strip()
+
+
+def _apply(dream, content: str) -> bool:
+    """Refresh analysis/summary/tone; classification, images and visibility stay as they are."""
+    parsed = _app()._parse_analysis_reply(content)
+    if parsed["is_nonsense"] or not parsed["analysis"]:
+        return False
+    dream.analysis = parsed["analysis"]
+    if parsed["summary"]:
+        dream.summary = parsed["summary"]
+    if not dream.is_question and parsed["tone"]:
+        dream.tone = parsed["tone"]
+    return True
+
+
+def run(name: str, *, filters: dict | None = None, batch_size: int = 50, concurrency: int = 8,
+        limit: int | None = None, reset: bool = False, dry_run: bool = False,
+        retry_failed: bool = False, on_batch=None) -> dict:
+    """
+    Re-analyze dreams matching `filters` (user_id, interpreter_id, min_id, max_id),
+    resuming run `name` from its checkpoint. Returns the final counters.
+    `retry_failed` re-tries the run's failed_ids instead of moving the cursor.
+    `on_batch(stats)` is called after every committed batch. dry_run calls the
+    model but writes nothing except the checkpoint (use a separate run name).
+    If OpenAI is unavailable (breaker open, limiter full) the batch is rolled
+    back and the run stops with status "paused"; re-run it to resume.
+    """
+    a = _app()
+    db = a.db
+    run_row = get_or_start_run(name, filters or {}, reset=reset)
+    retry_queue = list(run_row.failed_ids or []) if retry_failed else None
+    logger.info("reanalyze %s starting after dream %s (%s processed so far%s)",
+                name, run_row.last_dream_id, run_row.processed,
+                f", retrying {len(retry_queue)} failed" if retry_failed else "")
+
+    done_this_session = 0
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="reanalyze") as pool:
+        while True:
+            size = batch_size if limit is None else min(batch_size, limit - done_this_session)
+            if size <= 0:
+                break
+            if retry_failed:
+                attempted = set(retry_queue[:size])
+                retry_queue = retry_queue[size:]
+                batch = _retry_batch(attempted)
+            else:
+                batch = _next_batch(run_row, size)
+                attempted = {d.id for d in batch}
+            if not attempted:
+                # a retry pass finishes the run only if the main pass already had
+                run_row.status = "done" if not (retry_failed and _next_batch(run_row, 1)) else "paused"
+                db.session.commit()
+                break
+
+            t0 = time.monotonic()
+            prompts = _prompts_for(batch)
+            futures = {d.id: pool.submit(_call_model, *prompts[d.id]) for d in batch}
+
+            updated = 0
+            failed_ids = []
+            unavailable = None
+            for d in batch:
+                try:
+                    content = futures[d.id].result()
+                except AIUnavailableError as e:
+                    unavailable = e
+                    break
+                except Exception as e:
+                    failed_ids.append(d.id)
+                    logger.warning("reanalyze %s: dream %s failed: %s", name, d.id, e)
+                    continue
+                if dry_run:
+                    updated += 1
+                elif _apply(d, content):
+                    updated += 1
+
+            if unavailable is not None:
+                for f in futures.values():
+                    f.cancel()
+                db.session.rollback()  # nothing from this batch; the checkpoint stays put
+                run_row.status = "paused"
+                db.session.commit()
+                logger.warning("reanalyze %s: paused before dream %s: %s", name, min(attempted), unavailable)
+                break
+
+            # results + checkpoint in one transaction
+            # (a retried id that no longer exists is simply dropped)
+            kept = [i for i in (run_row.failed_ids or []) if not (retry_failed and i in attempted)]
+            run_row.failed_ids = kept + failed_ids
+            if not retry_failed:
+                run_row.last_dream_id = batch[-1].id
+                run_row.processed += len(batch)
+            run_row.updated += updated
+            run_row.failed = len(run_row.failed_ids)
+            run_row.elapsed_secs += time.monotonic() - t0
+            db.session.commit()
+            done_this_session += len(attempted)
+
+            stats = progress(run_row)
+            logger.info("reanalyze %s: through dream %s, %s processed, %s failed, %.1f dreams/min",
+                        name, stats["last_dream_id"], stats["processed"], stats["failed"], stats["dreams_per_min"])
+            if on_batch:
+                on_batch(stats)
+
+    return progress(run_row)
+
+
+def progress(run_row: "ReanalyzeRun") -> dict:
+    rate = (run_row.processed / run_row.elapsed_secs * 60.0) if run_row.elapsed_secs else 0.0
+    return {
+        "name": run_row.name,
+        "status": run_row.status,
+        "filters": run_row.filters,
+        "last_dream_id": run_row.last_dream_id,
+        "processed": run_row.processed,
+        "updated": run_row.updated,
+        "failed": run_row.failed,
+        "failed_ids": list(run_row.failed_ids or []),
+        "dreams_per_min": round(rate, 1),
+    }
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Regenerate image derivatives after a tile size / format change:
+dream tiles + WebP/AVIF variants (+ placeholders still missing), and
+interpreter icon tiles. Walks Dream.image_file / Interpreter.icon_file by id,
+decodes in a process pool, skips files whose derivatives are already up to
+date, and checkpoints the last committed id so an interrupted run resumes.
+Placeholders (placeholders/decline.png etc.) are never touched.
+
+  python scripts/backfill_images.py
+  python scripts/backfill_images.py --only dreams --workers 8
+  python scripts/backfill_images.py --force --reset      # rebuild everything
+"""
+import sys
+from pathlib import Path
+
+# Add project root to PYTHONPATH
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import images
+
+IMAGES = os.path.join(ROOT, "static", "images")
+SOURCES = {
+    # kind -> (original dir, tile dir)
+    "dreams": (os.path.join(IMAGES, "dreams"), os.path.join(IMAGES, "tiles")),
+    "interpreters": (os.path.join(IMAGES, "interpreters"), os.path.join(IMAGES, "interpreters_tiles")),
+}
+DEFAULT_CHECKPOINT = os.path.join(ROOT, "backfill_images.checkpoint.json")
+
+
+def _work(item):
+    # worker process: filesystem only, no app/DB import
+    kind, row_id, filename, stored_variants, want_placeholder, sizes, force = item
+    src_dir, tile_dir = SOURCES[kind]
+    try:
+        out = images.refresh_derivatives(
+            os.path.join(src_dir, filename), os.path.join(tile_dir, filename),
+            sizes=sizes, stored_variants=stored_variants,
+            want_variants=(kind == "dreams"), want_placeholder=want_placeholder, force=force,
+        )
+        return row_id, out, None
+    except Exception as e:
+        return row_id, None, str(e)
+
+
+def _load_checkpoint(path: str, signature: dict, reset: bool) -> dict:
+    if not reset and os.path.exists(path):
+        with open(path) as f:
+            state = json.load(f)
+        if state.get("signature") == signature:
+            return state
+        print("derivative settings changed since the checkpoint; starting over", flush=True)
+    return {"signature": signature, "last_id": {}}
+
+
+def _save_checkpoint(path: str, state: dict) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel, resumable image derivative backfill")
+    parser.add_argument("--only", choices=sorted(SOURCES), help="Just dreams or just interpreter icons")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Decode processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=200, help="Rows per fetch/commit (default 200)")
+    parser.add_argument("--limit", type=int, help="Stop after this many images (this invocation)")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if derivatives look up to date")
+    parser.add_argument("--reset", action="store_true", help="Ignore the checkpoint and start from the first id")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Checkpoint file path")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)  # derivative paths (images.VARIANT_DIR) are relative to the app root
+    from app import app, db, Dream, Interpreter, IMAGE_VARIANT_SIZES
+
+    sizes = tuple(IMAGE_VARIANT_SIZES)
+    signature = {"sizes": list(sizes), "formats": list(images.FORMATS), "force": args.force}
+    state = _load_checkpoint(args.checkpoint, signature, args.reset)
+
+    models = {"dreams": (Dream, Dream.image_file), "interpreters": (Interpreter, Interpreter.icon_file)}
+    kinds = [args.only] if args.only else list(SOURCES)
+
+    seen = rebuilt = skipped = failed = 0
+    t0 = time.monotonic()
+    with app.app_context(), ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for kind in kinds:
+            model, col = models[kind]
+            last_id = state["last_id"].get(kind, 0)
+            while args.limit is None or seen < args.limit:
+                size = args.batch_size if args.limit is None else min(args.batch_size, args.limit - seen)
+                rows = (model.query
+                        .filter(model.id > last_id, col.isnot(None), col != "", ~col.like("placeholders/%"))
+                        .order_by(model.id.asc())
+                        .limit(size)
+                        .all())
+                if not rows:
+                    break
+
+                by_id = {r.id: r for r in rows}
+                work = []
+                for r in rows:
+                    if kind == "dreams":
+                        work.append((kind, r.id, r.image_file, r.image_variants,
+                                     r.image_blurhash is None, sizes, args.force))
+                    else:
+                        work.append((kind, r.id, r.icon_file, None, False, sizes, args.force))
+
+                for row_id, out, err in pool.map(_work, work, chunksize=4):
+                    seen += 1
+                    if err is not None:
+                        failed += 1
+                        print(f"{kind} #{row_id}: {err}", file=sys.stderr)
+                    elif out is None:
+                        skipped += 1
+                    else:
+                        rebuilt += 1
+                        row = by_id[row_id]
+                        if out["variants"] is not None:
+                            old = row.image_variants
+                            row.image_variants = out["variants"] or None
+                            if old and old != row.image_variants:
+                                # superseded names (e.g. a dropped size); current ones are kept
+                                current = {n for by in (row.image_variants or {}).values() for n in by.values()}
+                                images.remove_variants({f: {s: n for s, n in by.items() if n not in current}
+                                                        for f, by in old.items()})
+                        if out["placeholder"] is not None:
+                            row.image_blurhash, row.image_color = out["placeholder"]
+
+                last_id = rows[-1].id
+                db.session.commit()
+                state["last_id"][kind] = last_id
+                _save_checkpoint(args.checkpoint, state)
+
+                rate = seen / (time.monotonic() - t0)
+                print(f"[{kind}] through #{last_id}: {rebuilt} rebuilt, {skipped} up to date, "
+                      f"{failed} failed, {rate:.1f} images/sec", flush=True)
+
+    elapsed = time.monotonic() - t0
+    print(f"finished: {seen} images in {elapsed:.1f}s ({seen / elapsed if elapsed else 0:.1f} images/sec); "
+          f"{rebuilt} rebuilt, {skipped} up to date, {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
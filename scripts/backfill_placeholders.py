@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Compute BlurHash + dominant colour for dreams that have an image but no placeholder.
+Decoding runs in a process pool; the parent writes results in batches, so an
+interrupted run just picks up the rows still missing a placeholder.
+
+  python scripts/backfill_placeholders.py
+  python scripts/backfill_placeholders.py --workers 8 --batch-size 500
+"""
+import sys
+from pathlib import Path
+
+# Add project root to PYTHONPATH
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import images
+
+DREAM_DIR = os.path.join(ROOT, "static", "images", "dreams")
+
+
+def _compute(item):
+    # worker process: file -> placeholder only, no app/DB import
+    dream_id, image_file = item
+    try:
+        return dream_id, images.placeholder_for_file(os.path.join(DREAM_DIR, image_file)), None
+    except Exception as e:
+        return dream_id, None, str(e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill dream image placeholders (BlurHash + colour)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Decode processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=200, help="Rows per fetch/commit (default 200)")
+    parser.add_argument("--limit", type=int, help="Stop after this many dreams")
+    args = parser.parse_args()
+
+    from app import app, db, Dream, bump_journal_version
+
+    with app.app_context():
+        done = failed = 0
+        last_id = 0   # failures stay NULL; keyset keeps us from re-fetching them
+        t0 = time.monotonic()
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            while args.limit is None or done + failed < args.limit:
+                size = args.batch_size if args.limit is None else min(args.batch_size, args.limit - done - failed)
+                rows = (db.session.query(Dream.id, Dream.user_id, Dream.image_file)
+                        .filter(Dream.id > last_id,
+                                Dream.image_blurhash.is_(None),
+                                Dream.image_file.isnot(None),
+                                Dream.image_file != "",
+                                ~Dream.image_file.like("placeholders/%"))
+                        .order_by(Dream.id.asc())
+                        .limit(size)
+                        .all())
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                owners = {r.id: r.user_id for r in rows}
+                touched = set()
+
+                for dream_id, result, err in pool.map(_compute, [(r.id, r.image_file) for r in rows], chunksize=8):
+                    if result is None:
+                        failed += 1
+                        print(f"dream {dream_id}: {err}", file=sys.stderr)
+                        continue
+                    blurhash, color = result
+                    Dream.query.filter_by(id=dream_id).update(
+                        {"image_blurhash": blurhash, "image_color": color}, synchronize_session=False)
+                    touched.add(owners[dream_id])
+                    done += 1
+                bump_journal_version(touched)  # bulk update skips the Dream flush hook
+                db.session.commit()
+
+                rate = (done + failed) / (time.monotonic() - t0)
+                print(f"through #{last_id}: {done} done, {failed} failed, {rate:.1f} images/sec", flush=True)
+
+    print(f"finished: {done} done, {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
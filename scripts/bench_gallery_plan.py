@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Show the gallery query plan before/after has_real_image + ix_dream_gallery on
+a synthetic table (bench_dream) of a few million rows. Run against a scratch
+MariaDB database, never production: the table is dropped and rebuilt.
+
+  python scripts/bench_gallery_plan.py --dsn mysql+pymysql://u:p@127.0.0.1/bench
+  python scripts/bench_gallery_plan.py --dsn ... --rows 3000000 --heavy-rows 5000 --reuse
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+
+TABLE = "bench_dream"
+HEAVY_USER = 1
+
+OLD_QUERY = f"""
+SELECT id, summary, tone, image_file, created_at FROM {TABLE}
+WHERE user_id = :uid
+  AND (hidden = 0 OR hidden IS NULL)
+  AND image_file IS NOT NULL
+  AND LENGTH(TRIM(image_file)) > 0
+  AND LOWER(image_file) NOT LIKE '%placehold%'
+  AND (is_question = 0 OR is_question IS NULL)
+ORDER BY created_at DESC, id DESC
+LIMIT :lim
+"""
+
+NEW_QUERY = f"""
+SELECT id, summary, tone, image_file, created_at FROM {TABLE}
+WHERE user_id = :uid AND hidden = 0 AND is_question = 0 AND has_real_image = 1
+ORDER BY created_at DESC, id DESC
+LIMIT :lim
+"""
+
+
+def build(engine, rows: int, users: int, heavy_rows: int, batch: int = 20000) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+        conn.execute(text(f"""
+            CREATE TABLE {TABLE} (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                user_id INT NOT NULL,
+                summary TEXT,
+                tone VARCHAR(50),
+                hidden TINYINT(1) NULL,
+                is_question TINYINT(1) NOT NULL DEFAULT 0,
+                image_file VARCHAR(255),
+                has_real_image TINYINT(1) NOT NULL DEFAULT 0,
+                created_at DATETIME,
+                KEY ix_bench_user (user_id),
+                KEY ix_bench_user_created_id (user_id, created_at, id)
+            ) ENGINE=InnoDB
+        """))
+
+    rnd = random.Random(42)
+    start = datetime(2024, 1, 1)
+    filler = "a dream about " + "x" * 200
+    insert = text(f"""INSERT INTO {TABLE}
+        (user_id, summary, tone, hidden, is_question, image_file, has_real_image, created_at)
+        VALUES (:user_id, :summary, :tone, :hidden, :is_question, :image_file, :has_real_image, :created_at)""")
+
+    def row(uid):
+        r = rnd.random()
+        if r < 0.08:
+            image = "placeholders/decline.png"
+        elif r < 0.12:
+            image = "placeholders/question2.png"
+        elif r < 0.25:
+            image = None
+        else:
+            image = f"{rnd.getrandbits(128):032x}.png"
+        real = bool(image) and "placehold" not in image
+        return {
+            "user_id": uid, "summary": filler, "tone": "calm",
+            "hidden": rnd.choice((0, 0, 0, 0, 1, None)), "is_question": int(r >= 0.08 and r < 0.12),
+            "image_file": image, "has_real_image": int(real),
+            "created_at": start + timedelta(seconds=rnd.randrange(60 * 86400 * 12)),
+        }
+
+    t0 = time.monotonic()
+    pending = [row(HEAVY_USER) for _ in range(heavy_rows)]
+    done = batches = 0
+    with engine.begin() as conn:
+        while done < rows:
+            while len(pending) < batch and done + len(pending) < rows:
+                pending.append(row(rnd.randrange(2, users + 2)))
+            conn.execute(insert, pending)
+            done += len(pending)
+            batches += 1
+            pending = []
+            if batches % 25 == 0:
+                print(f"  {done:,} rows ({done / (time.monotonic() - t0):,.0f}/s)", flush=True)
+    with engine.begin() as conn:
+        conn.execute(text(f"UPDATE {TABLE} SET hidden = 0 WHERE hidden IS NULL"))
+        conn.execute(text(f"ANALYZE TABLE {TABLE}"))
+    print(f"built {rows:,} rows in {time.monotonic() - t0:.0f}s")
+
+
+def explain(conn, sql: str, params: dict) -> None:
+    result = conn.execute(text("EXPLAIN " + sql), params)
+    cols = list(result.keys())
+    for r in result:
+        r = dict(zip(cols, r))
+        print(f"    type={r.get('type')} key={r.get('key')} rows={r.get('rows')} extra={r.get('Extra')}")
+
+
+def timed(conn, sql: str, params: dict, repeat: int) -> tuple[float, int]:
+    samples, n = [], 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        n = len(conn.execute(text(sql), params).fetchall())
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(samples), n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gallery query plan before/after has_real_image")
+    parser.add_argument("--dsn", required=True, help="SQLAlchemy URL of a scratch MariaDB database")
+    parser.add_argument("--rows", type=int, default=3_000_000, help="Total synthetic dreams (default 3M)")
+    parser.add_argument("--users", type=int, default=50_000, help="Users the rest are spread over")
+    parser.add_argument("--heavy-rows", type=int, default=5_000, help="Dreams owned by the measured user")
+    parser.add_argument("--limit", type=int, default=50, help="Page size queried (default 50)")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query (default 20)")
+    parser.add_argument("--reuse", action="store_true", help="Keep an existing bench_dream table")
+    args = parser.parse_args()
+
+    engine = create_engine(args.dsn)
+    if not args.reuse:
+        build(engine, args.rows, args.users, args.heavy_rows)
+
+    params = {"uid": HEAVY_USER, "lim": args.limit}
+    with engine.connect() as conn:
+        conn.execute(text(f"DROP INDEX IF EXISTS ix_bench_gallery ON {TABLE}"))
+        print("\nbefore (function-wrapped predicates, no gallery index):")
+        explain(conn, OLD_QUERY, params)
+        old_ms, old_n = timed(conn, OLD_QUERY, params, args.repeat)
+        print(f"    median {old_ms:.2f} ms, {old_n} rows")
+
+        conn.execute(text(f"CREATE INDEX ix_bench_gallery ON {TABLE} "
+                          f"(user_id, hidden, is_question, has_real_image, created_at, id)"))
+        conn.execute(text(f"ANALYZE TABLE {TABLE}"))
+        print("\nafter (has_real_image + ix_dream_gallery layout):")
+        explain(conn, NEW_QUERY, params)
+        new_ms, new_n = timed(conn, NEW_QUERY, params, args.repeat)
+        print(f"    median {new_ms:.2f} ms, {new_n} rows")
+
+    if old_n != new_n:
+        print(f"\nWARNING: row counts differ ({old_n} vs {new_n})")
+    print(f"\nspeedup: {old_ms / new_ms if new_ms else float('inf'):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: journal list serialization, old per-endpoint code path
+(print per row + dict building + Flask-style json.dumps) vs serializers.py.
+Synthetic 1,000-dream journal, no database.
+
+  python scripts/bench_serializer.py
+  python scripts/bench_serializer.py --dreams 5000 --repeat 50
+"""
+import sys
+from pathlib import Path
+
+# Add project root to PYTHONPATH
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import statistics
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+import serializers
+from serializers import DreamSerializer
+
+TZ = "America/Los_Angeles"
+
+
+def make_journal(n: int):
+    rnd = random.Random(7)
+    interp = SimpleNamespace(id=3, name="Warm Storyteller", icon_file="warm.png", animated_icon_file="warm.mp4")
+    words = "river door falling house teeth flying ocean mother school train night light".split()
+    start = datetime(2024, 1, 1)
+    rows = []
+    for i in range(n):
+        text = " ".join(rnd.choice(words) for _ in range(rnd.randint(60, 250)))
+        rows.append((SimpleNamespace(
+            id=i + 1, summary=text[:160], text=text, analysis=text * 3, notes=text[:300] if i % 4 == 0 else None,
+            tone="Peaceful / Calm", hidden=False, image_file=f"{rnd.getrandbits(128):032x}.png",
+            image_variants={"webp": {"256": f"{i:020x}-256.webp", "512": f"{i:020x}-512.webp"}},
+            image_blurhash="LEHV6nWB2yk8pyo0adR*.7kCMdnj", image_color="#6a5a8c",
+            created_at=start + timedelta(hours=i * 7), interpreter_id=3,
+        ), interp))
+    return rows
+
+
+def legacy(rows, tz_name):
+    # what get_dreams did per request before serializers.py (stdout -> /dev/null)
+    user_tz = ZoneInfo(tz_name or "UTC")
+
+    def convert_created_at(dt):
+        try:
+            print(f"Original datetime: {dt} (tzinfo={dt.tzinfo})")
+            return dt.replace(tzinfo=timezone.utc).astimezone(user_tz).isoformat()
+        except Exception as e:
+            print(f"[ERROR] Timestamp conversion failed: {e}")
+            traceback.print_exc()
+            return None
+
+    def interpreter_icon_path(interp):
+        if not interp:
+            return None
+        f = interp.animated_icon_file or interp.icon_file
+        return f"/static/images/interpreters/{f}" if f else None
+
+    items = [{
+        "id": d.id,
+        "summary": d.summary,
+        "text": d.text,
+        "analysis": d.analysis,
+        "tone": d.tone,
+        "image_file": f"/static/images/dreams/{d.image_file}" if d.image_file else None,
+        "image_tile": f"/static/images/tiles/{d.image_file}" if d.image_file else None,
+        "image_variants": serializers.images.variant_urls(d.image_variants),
+        "image_blurhash": d.image_blurhash,
+        "image_color": d.image_color,
+        "created_at": convert_created_at(d.created_at) if d.created_at else None,
+        "notes": d.notes,
+        "interpreter_id": d.interpreter_id,
+        "interpreter_name": interp.name if interp else None,
+        "interpreter_icon": interpreter_icon_path(interp),
+    } for d, interp in rows]
+    # Flask's default JSON provider settings
+    return json.dumps(items, ensure_ascii=True, sort_keys=True, separators=(",", ":")).encode()
+
+
+def current(rows, tz_name, compact=False):
+    serializer = DreamSerializer(tz_name, compact=compact, notes=True, interpreter=True)
+    return serializers.dumps([serializer(d, interp) for d, interp in rows])
+
+
+def bench(fn, repeat):
+    samples = []
+    out = b""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            out = fn()
+            samples.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(samples), len(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dream list serializer micro-benchmark")
+    parser.add_argument("--dreams", type=int, default=1000, help="Journal size (default 1000)")
+    parser.add_argument("--repeat", type=int, default=30, help="Runs per variant (default 30)")
+    args = parser.parse_args()
+
+    rows = make_journal(args.dreams)
+    print(f"{args.dreams} dreams, encoder: {'orjson' if serializers.orjson else 'json'}")
+    results = [
+        ("legacy (print + jsonify)", bench(lambda: legacy(rows, TZ), args.repeat)),
+        ("serializers.py full", bench(lambda: current(rows, TZ), args.repeat)),
+        ("serializers.py compact", bench(lambda: current(rows, TZ, compact=True), args.repeat)),
+    ]
+    base = results[0][1][0]
+    for name, (ms, size) in results:
+        print(f"  {name:<26} {ms:8.2f} ms  {size / 1024:8.1f} KiB  {base / ms:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
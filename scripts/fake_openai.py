@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Minimal stand-in for the OpenAI chat completions API, for load-testing
+reanalysis and the job worker without spending tokens:
+
+  python scripts/fake_openai.py --port 8089 --latency 0.8
+  export OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=fake
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = (
+    "**Analysis:** This dream reflects a period of transition; the shifting rooms "
+    "suggest you are reorganising how you see yourself.\n\n"
+    "**Summary:** A house that keeps changing shape\n\n"
+    "**Tone:** Peaceful / gentle\n\n"
+    "**Type:** Dream"
+)
+
+
+class Handler(BaseHTTPRequestHandler):
+    latency = 0.0
+    error_rate = 0.0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._send(404, {"error": {"message": "not found"}})
+        if random.random() < self.error_rate:
+            return self._send(503, {"error": {"message": "fake overload"}})
+        req = json.loads(body or b"{}")
+        time.sleep(self.latency * random.uniform(0.5, 1.5))
+        prompt_tokens = sum(len(m.get("content") or "") for m in req.get("messages", [])) // 4
+        self._send(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": req.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": REPLY}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(REPLY) // 4,
+                      "total_tokens": prompt_tokens + len(REPLY) // 4},
+        })
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.5, help="Mean seconds per completion")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered 503")
+    args = parser.parse_args()
+    Handler.latency = args.latency
+    Handler.error_rate = args.error_rate
+    print(f"fake OpenAI on http://127.0.0.1:{args.port}/v1", flush=True)
+    ThreadingHTTPServer(("127.0.0.1", args.port), Handler).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
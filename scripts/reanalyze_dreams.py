@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Re-run dream analysis over stored dreams (after a prompt or interpreter change).
+Resumable: progress is checkpointed per --run name in reanalyze_runs. Dreams
+that failed are kept on the run; retry them with --retry-failed. If OpenAI is
+unavailable the run pauses; re-run the same command to resume.
+
+  python scripts/reanalyze_dreams.py --run dream-prompt-v7
+  python scripts/reanalyze_dreams.py --run warm-v2 --interpreter warm_storyteller --concurrency 16
+  python scripts/reanalyze_dreams.py --run dream-prompt-v7 --retry-failed
+  OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=x \
+      python scripts/reanalyze_dreams.py --run smoke --limit 200 --dry-run   # with scripts/fake_openai.py
+"""
+import sys
+from pathlib import Path
+
+# Add project root to PYTHONPATH
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import argparse
+import json
+
+from app import app, Interpreter
+import reanalyze
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk re-analysis of stored dreams")
+    parser.add_argument("--run", required=True, help="Run name; re-using it resumes from the checkpoint")
+    parser.add_argument("--user-id", type=int, help="Only this user's dreams")
+    parser.add_argument("--interpreter", help="Only dreams analyzed by this interpreter slug")
+    parser.add_argument("--min-id", type=int, help="Start after this dream id")
+    parser.add_argument("--max-id", type=int, help="Stop at this dream id")
+    parser.add_argument("--batch-size", type=int, default=50, help="Dreams per transaction (default 50)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel model calls (default 8)")
+    parser.add_argument("--limit", type=int, help="Stop after this many dreams (this invocation)")
+    parser.add_argument("--reset", action="store_true", help="Discard the checkpoint and start over")
+    parser.add_argument("--retry-failed", action="store_true", help="Re-try the dreams this run failed on")
+    parser.add_argument("--dry-run", action="store_true", help="Call the model but don't write results")
+    args = parser.parse_args()
+
+    with app.app_context():
+        filters = {}
+        if args.user_id:
+            filters["user_id"] = args.user_id
+        if args.interpreter:
+            interp = Interpreter.query.filter_by(slug=args.interpreter).one_or_none()
+            if interp is None:
+                sys.exit(f"unknown interpreter: {args.interpreter}")
+            filters["interpreter_id"] = interp.id
+        if args.min_id:
+            filters["min_id"] = args.min_id
+        if args.max_id:
+            filters["max_id"] = args.max_id
+
+        def report(stats):
+            print(f"[{stats['name']}] through #{stats['last_dream_id']}: "
+                  f"{stats['processed']} processed, {stats['updated']} updated, "
+                  f"{stats['failed']} failed, {stats['dreams_per_min']} dreams/min", flush=True)
+
+        try:
+            stats = reanalyze.run(
+                args.run, filters=filters, batch_size=args.batch_size,
+                concurrency=args.concurrency, limit=args.limit, reset=args.reset,
+                dry_run=args.dry_run, retry_failed=args.retry_failed, on_batch=report,
+            )
+        except ValueError as e:
+            sys.exit(str(e))
+        except KeyboardInterrupt:
+            sys.exit("interrupted; re-run with the same --run to resume")
+
+    print(json.dumps(stats, indent=2))
+    if stats["status"] == "paused":
+        sys.exit("paused: OpenAI unavailable; re-run with the same --run to resume")
+
+
+if __name__ == "__main__":
+    main()
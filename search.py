@@ -0,0 +1,177 @@
+# search.py
+# Full-text search over one user's dreams (text, analysis, summary, notes).
+# MariaDB/MySQL: FULLTEXT index (ft_dream_search) + MATCH ... AGAINST for
+# ranking. Anything else (SQLite dev/test setups): an in-process BM25
+# inverted index per user, built on first search and keyed by the user's
+# journal_version so any dream write retires it. Both return the same
+# (score, id) ordering, so the cursor format is shared.
+from __future__ import annotations  # postpone annotation evaluation
+
+import base64
+import json
+import logging
+import math
+import re
+from collections import Counter
+
+from sqlalchemy import and_, or_
+
+from cache import TTLCache
+
+logger = logging.getLogger("dreamr")
+
+SEARCH_FIELDS = ("summary", "text", "notes", "analysis")
+# in-process ranking weights (MariaDB weighs all FULLTEXT columns alike)
+FIELD_WEIGHTS = {"summary": 2.0, "text": 1.5, "notes": 1.0, "analysis": 0.7}
+SNIPPET_RADIUS = 60
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _app():
+    # late import avoids circular import at module import time
+    import app
+    return app
+
+
+def tokenize(s: str | None) -> list[str]:
+    return [t for t in _TOKEN_RE.findall((s or "").lower()) if len(t) > 1]
+
+
+# --- cursor: (score, id), descending ---
+
+def encode_cursor(score: float, dream_id: int) -> str:
+    raw = json.dumps([score, dream_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[float, int]:
+    raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    score, dream_id = json.loads(raw)
+    return float(score), int(dream_id)
+
+
+# --- in-process backend ---
+
+class InvertedIndex:
+    """BM25 over the weighted concatenation of a user's dream fields."""
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, rows):
+        self.postings = {}   # term -> {dream_id: weighted tf}
+        self.lengths = {}    # dream_id -> weighted length
+        for row in rows:
+            tf = Counter()
+            for field in SEARCH_FIELDS:
+                w = FIELD_WEIGHTS[field]
+                for term in tokenize(getattr(row, field)):
+                    tf[term] += w
+            self.lengths[row.id] = sum(tf.values())
+            for term, n in tf.items():
+                self.postings.setdefault(term, {})[row.id] = n
+        self.avg_len = (sum(self.lengths.values()) / len(self.lengths)) if self.lengths else 0.0
+
+    def search(self, terms: list[str]) -> list[tuple[float, int]]:
+        n_docs = len(self.lengths)
+        scores = {}
+        for term in set(terms):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for dream_id, tf in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[dream_id] / (self.avg_len or 1))
+                scores[dream_id] = scores.get(dream_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(((round(s, 6), i) for i, s in scores.items()), reverse=True)
+
+
+class MemoryBackend:
+    name = "memory"
+
+    def __init__(self, max_users: int = 256, ttl: float = 900.0):
+        self._indexes = TTLCache(maxsize=max_users, ttl=ttl)
+
+    def _index(self, user) -> InvertedIndex:
+        a = _app()
+        key = (user.id, user.journal_version or 0)
+        index = self._indexes.get(key)
+        if index is None:
+            rows = (a.db.session.query(a.Dream.id, *(getattr(a.Dream, f) for f in SEARCH_FIELDS))
+                    .filter(a.Dream.user_id == user.id, a.Dream.hidden == False)
+                    .all())
+            index = InvertedIndex(rows)
+            self._indexes.set(key, index)
+        return index
+
+    def page(self, user, q: str, limit: int, cursor: tuple[float, int] | None) -> list[tuple[float, int]]:
+        hits = self._index(user).search(tokenize(q))
+        if cursor is not None:
+            c_score, c_id = cursor
+            hits = [(s, i) for s, i in hits if s < c_score or (s == c_score and i < c_id)]
+        return hits[:limit]
+
+
+# --- MariaDB backend ---
+
+class FulltextBackend:
+    name = "fulltext"
+
+    def page(self, user, q: str, limit: int, cursor: tuple[float, int] | None) -> list[tuple[float, int]]:
+        from sqlalchemy.dialects.mysql import match
+
+        a = _app()
+        Dream = a.Dream
+        score = match(Dream.text, Dream.analysis, Dream.summary, Dream.notes,
+                      against=q).in_natural_language_mode()
+        query = (a.db.session.query(score.label("score"), Dream.id)
+                 .filter(Dream.user_id == user.id, Dream.hidden == False, score > 0))
+        if cursor is not None:
+            c_score, c_id = cursor
+            query = query.filter(or_(score < c_score, and_(score == c_score, Dream.id < c_id)))
+        rows = query.order_by(score.desc(), Dream.id.desc()).limit(limit).all()
+        return [(float(s), i) for s, i in rows]
+
+
+def make_backend(dialect_name: str, configured: str | None = None, **kw):
+    """FULLTEXT on MySQL/MariaDB, in-process index elsewhere (or as configured: "fulltext"/"memory")."""
+    name = configured or ("fulltext" if dialect_name in ("mysql", "mariadb") else "memory")
+    if name == "fulltext":
+        return FulltextBackend()
+    return MemoryBackend(**kw)
+
+
+# --- snippets ---
+
+def snippet(row, q: str) -> dict | None:
+    """
+    Best field's excerpt around the first matched term:
+    {"field", "text", "highlights": [[start, end], ...]} (offsets into text).
+    """
+    terms = set(tokenize(q))
+    if not terms:
+        return None
+    for field in SEARCH_FIELDS:
+        value = getattr(row, field) or ""
+        spans = [(m.start(), m.end()) for m in _TOKEN_RE.finditer(value) if m.group().lower() in terms]
+        if not spans:
+            continue
+        start = max(0, spans[0][0] - SNIPPET_RADIUS)
+        end = min(len(value), spans[0][1] + SNIPPET_RADIUS)
+        # don't cut words in half
+        if start > 0:
+            space = value.find(" ", start)
+            start = space + 1 if 0 <= space < spans[0][0] else start
+        if end < len(value):
+            space = value.rfind(" ", spans[0][1], end)
+            end = space if space > 0 else end
+        prefix = "…" if start > 0 else ""
+        suffix = "…" if end < len(value) else ""
+        excerpt = prefix + value[start:end].replace("\n", " ") + suffix
+        shift = len(prefix) - start
+        return {
+            "field": field,
+            "text": excerpt,
+            "highlights": [[s + shift, e + shift] for s, e in spans if s >= start and e <= end],
+        }
+    return None
@@ -0,0 +1,125 @@
+# serializers.py
+# Dream (+ Interpreter) rows -> JSON for the journal/gallery endpoints.
+# URL prefixes are built once, zones are cached by name, and the body is
+# encoded straight to bytes (orjson when installed) instead of via jsonify.
+import json
+import logging
+from datetime import timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from flask import Response
+
+import images
+
+try:
+    import orjson  # optional: ~5-10x faster encoding of large journals
+except ImportError:  # pragma: no cover
+    orjson = None
+
+logger = logging.getLogger("dreamr")
+
+DREAM_IMAGE_PREFIX = "/static/images/dreams/"
+DREAM_TILE_PREFIX = "/static/images/tiles/"
+INTERPRETER_ICON_PREFIX = "/static/images/interpreters/"
+
+
+@lru_cache(maxsize=512)
+def user_zone(name: str | None):
+    try:
+        return ZoneInfo(name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning("unknown timezone %r; using UTC", name)
+        return timezone.utc
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def json_response(obj, status: int = 200) -> Response:
+    return Response(dumps(obj), status=status, mimetype="application/json")
+
+
+def _utc_z(dt):
+    return dt.isoformat() + "Z" if dt else None
+
+
+class DreamSerializer:
+    """
+    Built once per request (it holds the user's zone); call it per row.
+    Field set matches the list endpoints: `compact` drops text/analysis/notes,
+    `hidden`/`notes`/`interpreter` add those fields where an endpoint has them.
+    """
+
+    __slots__ = ("tz", "compact", "hidden", "notes", "interpreter")
+
+    def __init__(self, tz_name: str | None, *, compact: bool = False, hidden: bool = False,
+                 notes: bool = False, interpreter: bool = False):
+        self.tz = user_zone(tz_name)
+        self.compact = compact
+        self.hidden = hidden
+        self.notes = notes
+        self.interpreter = interpreter
+
+    def local_iso(self, dt):
+        # DB datetimes are naive UTC
+        return dt.replace(tzinfo=timezone.utc).astimezone(self.tz).isoformat() if dt else None
+
+    def __call__(self, d, interp=None) -> dict:
+        image = d.image_file
+        item = {
+            "id": d.id,
+            "summary": d.summary,
+        }
+        if self.hidden:
+            item["hidden"] = d.hidden
+        item["tone"] = d.tone
+        item["image_file"] = DREAM_IMAGE_PREFIX + image if image else None
+        item["image_tile"] = DREAM_TILE_PREFIX + image if image else None
+        item["image_variants"] = images.variant_urls(d.image_variants)
+        item["image_blurhash"] = d.image_blurhash
+        item["image_color"] = d.image_color
+        item["created_at"] = self.local_iso(d.created_at)
+        if self.interpreter:
+            item.update(self.interpreter_fields(d, interp))
+        if not self.compact:
+            item["text"] = d.text
+            item["analysis"] = d.analysis
+            if self.notes:
+                item["notes"] = d.notes
+        return item
+
+    @staticmethod
+    def interpreter_fields(d, interp) -> dict:
+        icon = (interp.animated_icon_file or interp.icon_file) if interp else None
+        return {
+            "interpreter_id": d.interpreter_id,
+            "interpreter_name": interp.name if interp else None,
+            "interpreter_icon": INTERPRETER_ICON_PREFIX + icon if icon else None,
+        }
+
+    def full(self, d, interp=None) -> dict:
+        """Single-dream shape (GET /api/dreams/<id>, /api/dreams/changes)."""
+        image = d.image_file
+        return {
+            "id": d.id,
+            "summary": d.summary,
+            "text": d.text,
+            "analysis": d.analysis,
+            "notes": d.notes,
+            "notes_updated_at": _utc_z(d.notes_updated_at),
+            "hidden": d.hidden,
+            "tone": d.tone,
+            "is_question": d.is_question,
+            "image_file": DREAM_IMAGE_PREFIX + image if image else None,
+            "image_tile": DREAM_TILE_PREFIX + image if image else None,
+            "image_variants": images.variant_urls(d.image_variants),
+            "image_blurhash": d.image_blurhash,
+            "image_color": d.image_color,
+            "created_at": self.local_iso(d.created_at),
+            **self.interpreter_fields(d, interp),
+            "updated_at": _utc_z(d.updated_at),
+        }
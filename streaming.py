@@ -0,0 +1,88 @@
+# streaming.py
+import json
+import re
+
+# Section markers the analysis prompt asks the model to emit, bold or plain.
+# A reply that opens with the bold **Analysis:** ends it at a bold marker only
+# (as _parse_analysis_reply does), so a plain "Tone:" in the prose isn't an end.
+_BOLD_END_MARKS = ("**Summary:**", "**Tone:**", "**Type:**")
+_END_MARKS = _BOLD_END_MARKS + ("Summary:", "Tone:", "Type:")
+_ANALYSIS_RE = re.compile(r"(\*\*)?Analysis:(\*\*)?")
+_BOLD_END_RE = re.compile(r"\*\*(Summary|Tone|Type):")
+_END_RE = re.compile(r"(\*\*)?(Summary|Tone|Type):")
+_HOLDBACK = max(len(m) for m in _END_MARKS)
+
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent-Events frame (data is JSON encoded)."""
+    payload = json.dumps(data, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+class AnalysisStreamParser:
+    """
+    Incrementally track the **Analysis:** block of a streamed dream reply.
+
+    feed() takes raw model deltas and returns only the analysis text that is
+    safe to forward, holding back any tail that could be the start of the
+    Summary/Tone/Type markers. The full reply is kept in .text so the caller
+    can run the normal (non-streaming) parser once the stream ends.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._start = None     # index right after the Analysis marker
+        self._emitted = None   # index up to which analysis text was sent
+        self._closed = False   # an end marker was seen
+        self._bold = False     # the Analysis marker was bold: so are the end markers
+
+    def feed(self, delta: str) -> str:
+        if not delta:
+            return ""
+        self.text += delta
+        if self._closed:
+            return ""
+
+        if self._start is None:
+            m = _ANALYSIS_RE.search(self.text)
+            if not m:
+                return ""
+            if m.group(1) and not m.group(2) and m.end() >= len(self.text) - 1:
+                return ""  # bold marker may still be closing ("**Analysis:*")
+            self._start = m.end()
+            self._emitted = self._start
+            self._bold = bool(m.group(1) and m.group(2))
+
+        end = (_BOLD_END_RE if self._bold else _END_RE).search(self.text, self._start)
+        if end:
+            self._closed = True
+            return self._take(end.start())
+        return self._take(self._safe_end())
+
+    def finish(self) -> str:
+        """Flush whatever analysis text was held back at end of stream."""
+        if self._start is None or self._closed:
+            return ""
+        self._closed = True
+        return self._take(len(self.text))
+
+    def _safe_end(self) -> int:
+        # Hold back a tail that could still grow into an end marker
+        n = len(self.text)
+        marks = _BOLD_END_MARKS if self._bold else _END_MARKS
+        for i in range(max(self._emitted, n - _HOLDBACK), n):
+            tail = self.text[i:]
+            if any(m.startswith(tail) for m in marks):
+                return i
+        return n
+
+    def _take(self, upto: int) -> str:
+        if upto <= self._emitted:
+            return ""
+        chunk = self.text[self._emitted:upto]
+        if self._emitted == self._start:
+            chunk = chunk.lstrip()
+            if not chunk:
+                return ""
+        self._emitted = upto
+        return chunk
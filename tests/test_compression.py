@@ -0,0 +1,47 @@
+from flask import Flask, Response
+
+import compression
+import metrics
+
+
+def _app():
+    app = Flask(__name__)
+    compression.init_app(app)
+
+    @app.get("/big")
+    def big():
+        return Response('{"x": "' + "dream " * 1000 + '"}', mimetype="application/json")
+
+    @app.get("/small")
+    def small():
+        return Response('{"x": 1}', mimetype="application/json")
+
+    return app
+
+
+def _counters(endpoint):
+    counters = metrics.snapshot("compress.")["counters"]
+    return {k.rsplit(".", 1)[1]: v for k, v in counters.items() if k.startswith(f"compress.{endpoint}.")}
+
+
+def test_bytes_counted_for_every_response():
+    client = _app().test_client()
+    before_big, before_small = _counters("big"), _counters("small")
+
+    big = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    identity = client.get("/big", headers={"Accept-Encoding": "identity"})
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+
+    assert big.headers["Content-Encoding"] == "gzip"
+    assert "Content-Encoding" not in identity.headers
+    raw = len(identity.data)
+
+    c = {k: v - before_big.get(k, 0) for k, v in _counters("big").items()}
+    assert c["responses"] == 2 and c["compressed"] == 1
+    assert c["bytes_in"] == 2 * raw
+    assert c["bytes_out"] == raw + len(big.data)
+    assert c["compressed_bytes_in"] == raw and c["compressed_bytes_out"] == len(big.data)
+
+    s = {k: v - before_small.get(k, 0) for k, v in _counters("small").items()}
+    assert s["responses"] == 1 and s["bytes_in"] == s["bytes_out"] == len(small.data)
+    assert s.get("compressed", 0) == 0
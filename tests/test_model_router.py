@@ -0,0 +1,23 @@
+import httpx
+import openai
+import pytest
+
+from model_router import _should_fall_back
+
+
+def _error(cls, status, message="error", code=None, param=None):
+    response = httpx.Response(status, request=httpx.Request("POST", "https://api.openai.com/v1/x"))
+    return cls(message, response=response, body={"message": message, "code": code, "param": param})
+
+
+@pytest.mark.parametrize("error, expected", [
+    (_error(openai.NotFoundError, 404, "The model `x` does not exist", "model_not_found"), True),
+    (_error(openai.PermissionDeniedError, 403), True),
+    (_error(openai.BadRequestError, 400, "The model `x` has been deprecated"), True),
+    (_error(openai.InternalServerError, 503), True),
+    (_error(openai.BadRequestError, 400, "Rejected by the safety system", "content_policy_violation"), False),
+    (_error(openai.BadRequestError, 400, "Invalid 'messages'", param="messages"), False),
+    (_error(openai.AuthenticationError, 401, "Incorrect API key"), False),
+])
+def test_should_fall_back(error, expected):
+    assert _should_fall_back(error) is expected
@@ -0,0 +1,18 @@
+from streaming import AnalysisStreamParser
+
+
+def _stream(reply: str, step: int = 3) -> str:
+    parser = AnalysisStreamParser()
+    out = "".join(parser.feed(reply[i:i + step]) for i in range(0, len(reply), step))
+    return out + parser.finish()
+
+
+def test_bold_markers_ignore_plain_word_in_prose():
+    analysis = "You dream of a Tonearm and Tone: a record that skips. Summary: not a marker."
+    reply = f"**Analysis:** {analysis}\n\n**Summary:** A skipping record.\n**Tone:** Calm\n**Type:** dream"
+    assert _stream(reply).strip() == analysis
+
+
+def test_plain_markers_end_at_plain_summary():
+    reply = "Analysis: A quiet house.\nSummary: House.\nTone: Calm"
+    assert _stream(reply).strip() == "A quiet house."
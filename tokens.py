@@ -0,0 +1,57 @@
+# tokens.py
+# Token counting for prompt budgeting. Uses tiktoken when installed, else a
+# ~4 chars/token estimate (close enough for English to size a budget).
+import logging
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover
+    tiktoken = None
+
+logger = logging.getLogger("dreamr")
+
+CHARS_PER_TOKEN = 4
+DEFAULT_MODEL = "gpt-4o"
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    # None (cached, so no retry per call) => the chars/token estimate
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # first use downloads the BPE file; offline or unwritable cache dir
+        logger.warning("tiktoken encoding for %s unavailable; estimating tokens", model, exc_info=True)
+        return None
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str, model: str = DEFAULT_MODEL) -> int:
+    """Token count of `text` (memoized: discussion turns are re-counted on every follow-up)."""
+    if not text:
+        return 0
+    enc = _encoding(model)
+    if enc is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = DEFAULT_MODEL, marker: str = " […]") -> str:
+    """Keep the head of `text` within `max_tokens` (marker included); unchanged if it already fits."""
+    if max_tokens <= 0 or not text:
+        return ""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    keep = max(max_tokens - count_tokens(marker, model), 0)
+    enc = _encoding(model)
+    if enc is None:
+        head = text[:keep * CHARS_PER_TOKEN]
+    else:
+        head = enc.decode(enc.encode(text, disallowed_special=())[:keep])
+    return head.rstrip() + marker
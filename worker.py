@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""Background worker for queued LLM jobs (analysis / discuss / image).
+
+Runs as its own process next to gunicorn so slow OpenAI calls never hold a
+request thread. Clients get 202 + job id and poll /api/jobs/<id>.
+
+Usage:
+  python worker.py                # 8 concurrent job slots
+  python worker.py --threads 16
+  python worker.py --once         # drain the queue, then exit
+"""
+import argparse
+
+import jobs
+from app import app  # importing app registers the job handlers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dreamr job worker")
+    parser.add_argument("--threads", type=int, default=8, help="concurrent job slots")
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    args = parser.parse_args()
+
+    jobs.run_worker(app, threads=max(1, args.threads), once=args.once)
+
+
+if __name__ == "__main__":
+    main()